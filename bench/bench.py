@@ -0,0 +1,296 @@
+"""Reproducible benchmarks for the Plinko hot paths.
+
+    python bench/bench.py -o results.json
+    python bench/bench.py --compare baseline.json          # exit 1 on regression
+    python bench/bench.py --quick --only update
+
+Every benchmark runs a fixed, seeded workload several times and reports the
+median and minimum wall time per operation. Rendering runs against the SDL
+dummy video driver, so no window is opened. ``--compare`` flags every
+benchmark whose median is more than ``--threshold`` slower than the stored
+baseline.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from collections.abc import Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+import pygame
+import pymunk
+
+from layouts import hex_grid
+from session import PlinkoSession
+from simulator import (
+    WIDTH, DROP_ZONE_HEIGHT, PEG_AREA_BOTTOM, FPS, PHYSICS_HZ, MAX_SUBSTEPS, DAMPING,
+    PlinkoSimulator,
+)
+
+PEG_COUNTS   = (0, 100, 1_000, 5_000)
+BALL_RADIUS  = 10         # small enough to pass the densest boards
+RAIN_WARMUP  = 120        # frames of rain before timing, so balls are in flight
+THRESHOLD    = 0.10       # default regression threshold (10 % slower median)
+
+
+# ── Workloads ────────────────────────────────────────────────────────────────
+
+def board(n: int, seed: int = 0) -> np.ndarray:
+    """``n`` peg positions spread over the whole peg area (fewer if they cannot fit)."""
+    if n == 0:
+        return np.empty((0, 2), np.float32)
+    # densest hex grid the overlap check allows, then a seeded random subset
+    spacing = 120.0
+    layout = hex_grid(spacing)
+    while len(layout) < n and spacing > 17:
+        spacing -= 1
+        layout = hex_grid(spacing)
+    rng = np.random.default_rng(seed)
+    return layout[rng.permutation(len(layout))[:n]]
+
+
+def measure(fn: Callable[[], int], rounds: int,
+            setup: Callable[[], object] | None = None) -> dict:
+    """Run ``fn`` ``rounds`` times; ``fn`` returns how many operations it did.
+
+    ``setup`` runs untimed before every round.
+    """
+    per_op = []
+    for _ in range(rounds):
+        if setup is not None:
+            setup()
+        start = time.perf_counter_ns()
+        ops = fn()
+        per_op.append((time.perf_counter_ns() - start) / max(ops, 1) / 1e6)
+    return {
+        "median_ms": statistics.median(per_op),
+        "min_ms":    min(per_op),
+        "rounds":    rounds,
+    }
+
+
+def substep_stats(samples: list[int]) -> dict:
+    """Substeps the simulator actually took per step, from ``sim.substeps`` samples."""
+    return {
+        "substeps_mean": statistics.fmean(samples) if samples else 0.0,
+        "substeps_max":  max(samples, default=0),
+    }
+
+
+def _game(pegs: np.ndarray, args):
+    from game import PlinkoGame
+    game = PlinkoGame(physics_hz=args.physics_hz, max_substeps=args.max_substeps)
+    game.rain_rng.seed(0)
+    game.load_pegs(pegs)
+    game.set_setting("ball_radius", BALL_RADIUS)
+    return game
+
+
+def bench_update(args) -> dict:
+    results = {}
+    for n in PEG_COUNTS:
+        game = _game(board(n), args)
+        game.set_raining(True)
+        for _ in range(RAIN_WARMUP):
+            game.update(1 / FPS)
+        substeps = []
+
+        def frames(game=game):
+            for _ in range(args.frames):
+                game.update(1 / FPS)
+                substeps.append(game.sim.substeps)     # the frame's last step
+            return args.frames
+
+        results[f"update/pegs={n}"] = {
+            **measure(frames, args.rounds),
+            "pegs": len(game.pegs), "balls": len(game.pool), "unit": "frame",
+            **substep_stats(substeps),
+        }
+    return results
+
+
+def bench_draw(args) -> dict:
+    results = {}
+    for n in (100, 1_000):
+        game = _game(board(n), args)
+        game.set_raining(True)
+        for _ in range(RAIN_WARMUP):
+            game.update(1 / FPS)
+        game.draw()
+
+        def frames(game=game, full=False):
+            for _ in range(args.frames):
+                game._full_redraw = full
+                game.draw()
+            return args.frames
+
+        extra = {"pegs": len(game.pegs), "balls": len(game.pool), "unit": "frame"}
+        results[f"draw/dirty/pegs={n}"] = {**measure(frames, args.rounds), **extra}
+        results[f"draw/full/pegs={n}"] = {
+            **measure(lambda: frames(full=True), args.rounds), **extra}
+
+        def rebuild(game=game):
+            for _ in range(10):
+                game._invalidate_board()
+                game._board_surface()
+            return 10
+
+        results[f"draw/board_layer/pegs={n}"] = {
+            **measure(rebuild, args.rounds), "pegs": len(game.pegs), "unit": "rebuild"}
+    return results
+
+
+def bench_pegs(args) -> dict:
+    """add_peg / remove_nearest_peg on a board that already has 1,000 pegs."""
+    base = board(1_000)
+    session = PlinkoSession(args.physics_hz, max_substeps=args.max_substeps)
+    rng = random.Random(0)
+    ops = args.frames * 10
+    points = [(rng.uniform(0, WIDTH), rng.uniform(DROP_ZONE_HEIGHT, PEG_AREA_BOTTOM))
+              for _ in range(ops)]
+
+    def reset():
+        session.load_pegs(base)
+
+    def add():
+        for p in points:
+            session.add_peg(p)
+        return ops
+
+    def remove():
+        for p in points:
+            session.remove_nearest_peg(p)
+        return ops
+
+    def load():
+        session.load_pegs(base)
+        return 1
+
+    return {
+        "pegs/add_peg":            {**measure(add, args.rounds, reset), "unit": "call"},
+        "pegs/remove_nearest_peg": {**measure(remove, args.rounds, reset), "unit": "call"},
+        "pegs/load_1000":          {**measure(load, args.rounds), "unit": "load"},
+    }
+
+
+def bench_drop(args) -> dict:
+    """Drop-to-bucket latency: wall time and simulated seconds per drop."""
+    results = {}
+    for n in (0, 100, 1_000):
+        sim = PlinkoSimulator(board(n), damping=DAMPING, max_substeps=args.max_substeps)
+        rng = random.Random(0)
+        xs = [rng.uniform(BALL_RADIUS, WIDTH - BALL_RADIUS) for _ in range(args.frames)]
+        sim_seconds = []
+        substeps = []
+
+        def drops():
+            sim_seconds.clear()
+            substeps.clear()
+            for x in xs:
+                body, shape = sim.add_ball(x, 0.75, BALL_RADIUS)
+                start = sim.time
+                while shape.scored_bucket is None and sim.time - start < 20.0:
+                    sim.step(1 / args.physics_hz)
+                    substeps.append(sim.substeps)
+                sim_seconds.append(sim.time - start)
+                sim.remove_ball(body, shape)
+            return len(xs)
+
+        results[f"drop/pegs={n}"] = {
+            **measure(drops, args.rounds),
+            "pegs": len(sim.pegs), "unit": "drop",
+            "sim_seconds_median": statistics.median(sim_seconds),
+            **substep_stats(substeps),
+        }
+    return results
+
+
+BENCHMARKS = {
+    "update": bench_update,
+    "draw":   bench_draw,
+    "pegs":   bench_pegs,
+    "drop":   bench_drop,
+}
+
+
+# ── Comparison ───────────────────────────────────────────────────────────────
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Lines describing each benchmark's change; regressions start with '!'."""
+    lines = []
+    for name, res in results.items():
+        base = baseline.get(name)
+        if base is None:
+            lines.append(f"  {name:<28} {res['median_ms']:>10.4f} ms   (new)")
+            continue
+        ratio = res["median_ms"] / base["median_ms"] if base["median_ms"] else float("inf")
+        flag = "!" if ratio > 1 + threshold else " "
+        lines.append(f"{flag} {name:<28} {res['median_ms']:>10.4f} ms   "
+                     f"baseline {base['median_ms']:.4f} ms   {ratio - 1:+.1%}")
+    return lines
+
+
+def environment(args) -> dict:
+    return {
+        "python":       platform.python_version(),
+        "platform":     platform.platform(),
+        "pymunk":       pymunk.version,
+        "pygame":       pygame.version.ver,
+        "physics_hz":   args.physics_hz,
+        "max_substeps": args.max_substeps,
+        "damping":      DAMPING,
+    }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Benchmark Plinko physics, rendering and peg operations")
+    parser.add_argument("-o", "--output", metavar="FILE", help="write results as JSON")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="fractional slowdown of the median that counts as a regression")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--frames", type=int, default=120, help="operations per round")
+    parser.add_argument("--quick", action="store_true", help="3 rounds of 30 operations")
+    parser.add_argument("--physics-hz", type=int, default=PHYSICS_HZ,
+                        help=f"fixed physics steps per second (default {PHYSICS_HZ})")
+    parser.add_argument("--max-substeps", type=int, default=MAX_SUBSTEPS,
+                        help="most substeps a fast ball may split one physics step into")
+    args = parser.parse_args(argv)
+    if args.physics_hz < 1 or args.max_substeps < 1:
+        parser.error("--physics-hz and --max-substeps must be at least 1")
+    if args.quick:
+        args.rounds, args.frames = 3, 30
+
+    results = {}
+    for name in args.only:
+        results.update(BENCHMARKS[name](args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"environment": environment(args), "results": results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        lines = compare(results, baseline, args.threshold)
+        print("\n".join(lines))
+        regressions = sum(line.startswith("!") for line in lines)
+        print(f"{regressions} regression(s) over {args.threshold:.0%}")
+        raise SystemExit(1 if regressions else 0)
+
+    for name, res in results.items():
+        print(f"{name:<28} {res['median_ms']:>10.4f} ms/{res['unit']}   (min {res['min_ms']:.4f})")
+
+
+if __name__ == "__main__":
+    main()
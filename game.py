@@ -0,0 +1,762 @@
+"""The pygame front end: PlinkoGame adds input, drawing and the main loop to a
+PlinkoSession. Start it with ``python plinko.py``; importing this module
+imports pygame, so headless code should not.
+"""
+import sys
+import random
+from dataclasses import asdict
+from itertools import islice
+from time import perf_counter_ns
+import pygame
+
+from simulator import (
+    WIDTH, HEIGHT, DROP_ZONE_HEIGHT, BUCKET_HEIGHT, PEG_AREA_BOTTOM,
+    PEG_RADIUS, NUM_BUCKETS, BUCKET_SCORES, FPS, PHYSICS_HZ, MAX_SUBSTEPS,
+    ELASTICITY_MIN, ELASTICITY_MAX, ELASTICITY_STEP,
+    GRAVITY_MIN, GRAVITY_MAX, GRAVITY_STEP,
+    DAMPING_MIN, DAMPING_MAX, DAMPING_STEP,
+    BALL_RADIUS_MIN, BALL_RADIUS_MAX, BALL_RADIUS_STEP,
+)
+from session import PlinkoSession
+from layouts import DEFAULT_LAYOUT_PATH, load_layout, save_layout
+from profiler import Profiler
+from preview import TrajectoryPreview
+from renderer import Renderer
+from stats import DEFAULT_STATS_PATH
+
+# ── Colours ───────────────────────────────────────────────────────────────────
+BG_COLOR        = (26,  26,  46)   # #1a1a2e  dark navy
+DROP_ZONE_COLOR = (35,  35,  60)
+PEG_COLOR       = (220, 220, 220)
+PEG_GLOW_COLOR  = (180, 180, 255, 80)
+BALL_COLOR      = (255, 215,   0)  # gold-yellow
+WALL_COLOR      = (80,  80, 120)
+DIVIDER_COLOR   = (200, 200, 200)
+BUCKET_LABEL_COLOR  = (200, 200, 200)
+BUCKET_HIT_COLOR    = (255, 200,   0)
+SCORE_TEXT_COLOR    = (255, 230,  80)
+UI_TEXT_COLOR       = (180, 180, 220)
+PROFILE_BG_COLOR    = (10,  10,  24, 200)
+GHOST_COLOR         = (120, 120, 170)
+
+# ── Sidebar ──────────────────────────────────────────────────────────────────
+SIDEBAR_WIDTH        = 240
+TOTAL_WIDTH          = WIDTH + SIDEBAR_WIDTH        # 1040
+SIDEBAR_X            = WIDTH                        # x=800
+SIDEBAR_BG_COLOR     = (20, 20, 38)
+SIDEBAR_BORDER_COLOR = (60, 60, 100)
+SIDEBAR_HEADER_COLOR = (100, 100, 180)
+SIDEBAR_TEXT_COLOR   = (160, 160, 210)
+SIDEBAR_VALUE_COLOR  = (255, 230, 80)
+SIDEBAR_BTN_COLOR    = (45, 45, 80)
+SIDEBAR_BTN_HOVER    = (65, 65, 110)
+SIDEBAR_BTN_TEXT     = (200, 200, 240)
+SIDEBAR_DIVIDER      = (50, 50, 90)
+STATS_BAR_COLOR      = (80, 80, 150)                # all-time share per bucket
+STATS_RECENT_COLOR   = (255, 200, 0)                # share over the recent window
+
+# ── Fixed-timestep loop ──────────────────────────────────────────────────────
+MAX_STEPS_PER_FRAME = 15   # physics steps run before giving up on catching up
+MAX_FRAME_SKIP      = 4    # frames left undrawn in a row while behind
+MAX_FRAME_TIME      = 0.25 # longest wall-clock gap fed to the accumulator
+IDLE_WAIT_MS        = 250  # longest block on input while every ball is asleep
+
+# ── Rendering caches ─────────────────────────────────────────────────────────
+MAX_DIRTY_RECTS = 64   # above this, repaint the whole board instead
+BOARD_RECT = pygame.Rect(0, 0, WIDTH, HEIGHT)
+
+# ── Profiler overlay (F3) ────────────────────────────────────────────────────
+PROFILE_REFRESH_MS = 500   # how often the overlay text is re-rendered
+PROFILE_POS        = (8, DROP_ZONE_HEIGHT + 8)
+
+# Sidebar bands, each repainted only when its own state changes
+SIDEBAR_MESSAGES_RECT = pygame.Rect(SIDEBAR_X, 0,   SIDEBAR_WIDTH, 182)
+SIDEBAR_STATS_RECT    = pygame.Rect(SIDEBAR_X, 182, SIDEBAR_WIDTH, 114)
+SIDEBAR_SETTINGS_RECT = pygame.Rect(SIDEBAR_X, 296, SIDEBAR_WIDTH, HEIGHT - 296)
+SIDEBAR_MESSAGE_LINES = 8      # newest messages shown
+STATS_REFRESH_MS      = 250    # how often the statistics band is re-rendered
+STATS_CHART_HEIGHT    = 56
+
+
+class PlinkoGame(PlinkoSession):
+
+    def __init__(self, layout_path: str | None = None, fps: int = FPS,
+                 physics_hz: int = PHYSICS_HZ, record_path: str | None = None,
+                 profile: bool = False, profile_out: str | None = None,
+                 max_substeps: int = MAX_SUBSTEPS, stats_out: str | None = None):
+        super().__init__(physics_hz, max_substeps=max_substeps)
+        # window and fonts; only the display and font modules are started
+        self.renderer = Renderer((TOTAL_WIDTH, HEIGHT))
+        self.screen = self.renderer.screen
+        self.clock = pygame.time.Clock()
+        self.fps   = fps
+
+        # fixed physics steps; render frames interpolate between the last two
+        self._accumulator = 0.0
+        self.alpha = 1.0
+        self._prev_ball_pos = (0.0, 0.0)        # ball position before the last step
+
+        fonts = self.renderer.fonts
+        self.font_large  = fonts["large"]
+        self.font_medium = fonts["medium"]
+        self.font_small  = fonts["small"]
+        self.font_tiny   = fonts["tiny"]
+
+        # static board layer (drop zone, pegs, buckets), rebuilt when pegs change
+        self._board_layer: pygame.Surface | None = None
+        self._peg_sprite = self._make_peg_sprite()
+
+        # dirty-rectangle state: what is on screen from the previous frame
+        self._full_redraw = True
+        self._ball_rects: list[pygame.Rect] = []
+        self._sidebar_keys: dict[str, tuple] = {}
+
+        # per-phase timings; F3 toggles collection and the overlay
+        self.profiler = Profiler(enabled=profile or profile_out is not None)
+        self.profile_out = profile_out
+        self._profile_panel: pygame.Surface | None = None
+        self._profile_drawn_at = 0
+
+        # outcome statistics band, re-rendered at most every STATS_REFRESH_MS
+        self.stats_path = stats_out or DEFAULT_STATS_PATH
+        self.stats_out  = stats_out
+        self._stats_key: tuple | None = None
+        self._stats_drawn_at = 0
+        self._stats_panel: pygame.Surface | None = None
+        self._stats_panel_key: tuple | None = None
+
+        # ghost path for a drop at the hovered x, computed off the main thread
+        self.preview = TrajectoryPreview(self.step_dt, max_substeps=self.sim.max_substeps)
+        self.preview.set_world((), self.settings)
+        self._hover_x: int | None = None
+
+        # Shift + right-drag box selection for bulk peg removal
+        self._select_start: tuple[int, int] | None = None
+
+        # settings controls: each dict describes one row
+        self.settings_controls = [
+            {
+                "label":    "Elasticity",
+                "sublabel": "next ball",
+                "attr":     "ball_elasticity",
+                "min":      ELASTICITY_MIN,
+                "max":      ELASTICITY_MAX,
+                "step":     ELASTICITY_STEP,
+                "fmt":      "{:.2f}",
+                "rect_dec": pygame.Rect(SIDEBAR_X + 10, 340, 40, 30),
+                "rect_inc": pygame.Rect(SIDEBAR_X + 190, 340, 40, 30),
+            },
+            {
+                "label":    "Gravity",
+                "sublabel": "live",
+                "attr":     "gravity_strength",
+                "min":      GRAVITY_MIN,
+                "max":      GRAVITY_MAX,
+                "step":     GRAVITY_STEP,
+                "fmt":      "{:.0f}",
+                "rect_dec": pygame.Rect(SIDEBAR_X + 10, 415, 40, 30),
+                "rect_inc": pygame.Rect(SIDEBAR_X + 190, 415, 40, 30),
+            },
+            {
+                "label":    "Damping",
+                "sublabel": "live",
+                "attr":     "damping_val",
+                "min":      DAMPING_MIN,
+                "max":      DAMPING_MAX,
+                "step":     DAMPING_STEP,
+                "fmt":      "{:.2f}",
+                "rect_dec": pygame.Rect(SIDEBAR_X + 10, 490, 40, 30),
+                "rect_inc": pygame.Rect(SIDEBAR_X + 190, 490, 40, 30),
+            },
+            {
+                "label":    "Ball Radius",
+                "sublabel": "next ball",
+                "attr":     "ball_radius",
+                "min":      BALL_RADIUS_MIN,
+                "max":      BALL_RADIUS_MAX,
+                "step":     BALL_RADIUS_STEP,
+                "fmt":      "{:.0f}",
+                "rect_dec": pygame.Rect(SIDEBAR_X + 10, 565, 40, 30),
+                "rect_inc": pygame.Rect(SIDEBAR_X + 190, 565, 40, 30),
+            },
+        ]
+
+        # S / L save and load the peg layout here
+        self.layout_path = layout_path or DEFAULT_LAYOUT_PATH
+        if layout_path is not None:
+            self.load_layout(layout_path)
+
+        if record_path is not None:
+            from replay import EventLogWriter
+            self.start_recording(EventLogWriter(record_path, physics_hz, self.rain_seed,
+                                                max_substeps))
+
+    # ── Peg management ────────────────────────────────────────────────────────
+
+    def _pegs_changed(self):
+        self._invalidate_board()
+        self.preview.set_world(self.sim.peg_positions(), self.settings)
+
+    def load_layout(self, path: str):
+        try:
+            layout = load_layout(path)
+        except (OSError, ValueError) as exc:
+            self._post_message(f"Load failed: {exc.__class__.__name__}")
+            return
+        self.load_pegs(layout)
+
+    def save_layout(self, path: str):
+        try:
+            save_layout(path, self.sim.peg_positions())
+        except OSError as exc:
+            self._post_message(f"Save failed: {exc.__class__.__name__}")
+            return
+        self._post_message(f"Saved {len(self.pegs)} pegs")
+
+    # ── Ball management ───────────────────────────────────────────────────────
+
+    def drop_ball(self, x_pygame: int) -> int | None:
+        slot = super().drop_ball(x_pygame)
+        if self.ball_body is not None:
+            self._prev_ball_pos = tuple(self.ball_body.position)
+        return slot
+
+    # ── Event handling ────────────────────────────────────────────────────────
+
+    def handle_events(self, events: list[pygame.event.Event] | None = None) -> bool:
+        for event in pygame.event.get() if events is None else events:
+            if event.type == pygame.QUIT:
+                return False
+
+            elif event.type == pygame.VIDEOEXPOSE:
+                self._full_redraw = True
+
+            elif event.type == pygame.MOUSEMOTION:
+                mx, my = event.pos
+                self._hover_x = mx if my < DROP_ZONE_HEIGHT and mx < SIDEBAR_X else None
+
+            elif event.type == pygame.WINDOWLEAVE:
+                self._hover_x = None
+
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                mx, my = event.pos
+                if mx >= SIDEBAR_X:                  # sidebar area
+                    if event.button == 1:
+                        self._handle_sidebar_click(mx, my)
+                else:                                # game board area (unchanged)
+                    if event.button == 1:  # left-click
+                        if my < DROP_ZONE_HEIGHT:
+                            self.drop_ball(mx)
+                        else:
+                            self.add_peg(event.pos)
+                    elif event.button == 3:  # right-click
+                        if pygame.key.get_mods() & pygame.KMOD_SHIFT:
+                            self._select_start = event.pos
+                        else:
+                            self.remove_nearest_peg(event.pos)
+
+            elif event.type == pygame.MOUSEBUTTONUP:
+                if event.button == 3 and self._select_start is not None:
+                    rect = self._selection_rect(event.pos)
+                    self.remove_pegs_in_rect(rect.left, rect.top, rect.right, rect.bottom)
+                    self._select_start = None
+
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    if event.mod & pygame.KMOD_SHIFT:
+                        self.drop_ball(random.randint(self.ball_radius, WIDTH - self.ball_radius))
+                    else:
+                        self.drop_ball(WIDTH // 2)
+                elif event.key == pygame.K_r:
+                    self.reset_ball()
+                elif event.key == pygame.K_c:
+                    self.clear_pegs()
+                elif event.key == pygame.K_x:
+                    if event.mod & pygame.KMOD_SHIFT:
+                        self.clear_stats()
+                    else:
+                        self.messages.clear()
+                elif event.key == pygame.K_e:
+                    self.export_stats(self.stats_path)
+                elif event.key == pygame.K_s:
+                    self.save_layout(self.layout_path)
+                elif event.key == pygame.K_l:
+                    self.load_layout(self.layout_path)
+                elif event.key == pygame.K_m:
+                    self.set_multi_ball(not self.multi_ball)
+                elif event.key == pygame.K_t:
+                    self.set_raining(not self.raining)
+                elif event.key == pygame.K_F3:
+                    self.profiler.enabled = not self.profiler.enabled
+                    self._profile_panel = None
+                elif event.key == pygame.K_ESCAPE:
+                    return False
+
+        return True
+
+    # ── Sidebar interaction ───────────────────────────────────────────────────
+
+    def set_setting(self, attr: str, value: float):
+        super().set_setting(attr, value)
+        self.preview.set_world(self.sim.peg_positions(), self.settings)
+
+    def _handle_sidebar_click(self, mx: int, my: int):
+        for ctrl in self.settings_controls:
+            if ctrl["rect_dec"].collidepoint(mx, my):
+                val = round(getattr(self, ctrl["attr"]) - ctrl["step"], 4)
+                self.set_setting(ctrl["attr"], max(ctrl["min"], val))
+            elif ctrl["rect_inc"].collidepoint(mx, my):
+                val = round(getattr(self, ctrl["attr"]) + ctrl["step"], 4)
+                self.set_setting(ctrl["attr"], min(ctrl["max"], val))
+            else:
+                continue
+            label = ctrl["label"].title()
+            fmt_val = ctrl["fmt"].format(getattr(self, ctrl["attr"]))
+            self._post_message(f"{label}: {fmt_val}")
+            break
+
+    # ── Physics update ────────────────────────────────────────────────────────
+
+    def update(self, dt: float) -> int:
+        """Advance the world by ``dt`` seconds of wall time in fixed steps.
+
+        At most MAX_STEPS_PER_FRAME steps run; time that is not consumed stays
+        in the accumulator. Returns the number of steps taken.
+        """
+        self._accumulator = min(self._accumulator + dt, MAX_FRAME_TIME)
+        steps = min(int(self._accumulator / self.step_dt), MAX_STEPS_PER_FRAME)
+        section = self.profiler.section
+        for i in range(steps):
+            if i == steps - 1:
+                self._snapshot_positions()
+            with section("physics"):
+                self.fixed_step()
+        self._accumulator -= steps * self.step_dt
+        self.alpha = min(1.0, self._accumulator / self.step_dt)
+        return steps
+
+    def _can_wait(self) -> bool:
+        """Nothing on screen would change until the next input."""
+        return (self.idle and not self._full_redraw and self._hover_x is None
+                and self._select_start is None and not self.profiler.enabled)
+
+    def _wait_for_events(self) -> list[pygame.event.Event]:
+        """Block until input arrives or IDLE_WAIT_MS pass; the wait is not simulated."""
+        event = pygame.event.wait(IDLE_WAIT_MS)
+        self.clock.tick()
+        self._accumulator = 0.0
+        first = [] if event.type == pygame.NOEVENT else [event]
+        return first + pygame.event.get()
+
+    @property
+    def behind(self) -> bool:
+        """True if the last update hit MAX_STEPS_PER_FRAME with steps still owed."""
+        return self._accumulator >= self.step_dt
+
+    def _snapshot_positions(self):
+        if self.ball_body is not None:
+            self._prev_ball_pos = tuple(self.ball_body.position)
+        self.pool.snapshot()
+
+    # ── Rendering ─────────────────────────────────────────────────────────────
+
+    def draw(self):
+        section = self.profiler.section
+        with section("draw_board"):
+            dirty = self._draw_board()
+        with section("draw_ui"):
+            ui = self._draw_ui()
+        self._ball_rects += ui          # restored from the board layer next frame
+        with section("draw_sidebar"):
+            dirty += ui + self._draw_sidebar()
+        with section("present"):
+            if self._full_redraw:
+                pygame.display.flip()
+                self._full_redraw = False
+            elif dirty:
+                pygame.display.update(dirty)
+
+    def _text(self, font: pygame.font.Font, text: str, color) -> pygame.Surface:
+        return self.renderer.text(font, text, color)
+
+    def _draw_board(self) -> list[pygame.Rect]:
+        """Repaint the board where balls were and are; returns the dirty rects."""
+        section = self.profiler.section
+        full = self._board_layer is None or self._full_redraw
+        layer = self._board_surface()
+        with section("draw_board/restore"):
+            if full or len(self._ball_rects) > MAX_DIRTY_RECTS:
+                self.screen.blit(layer, (0, 0))
+                restored = [BOARD_RECT]
+            else:
+                for rect in self._ball_rects:
+                    self.screen.blit(layer, rect, rect)
+                restored = self._ball_rects
+
+        self.screen.set_clip(BOARD_RECT)
+        with section("draw_board/ghost"):
+            rects = self._draw_ghost()
+        with section("draw_board/ball"):
+            rects += self._draw_ball()
+        with section("draw_board/pool_balls"):
+            rects += self._draw_pool_balls()
+        with section("draw_board/selection"):
+            rects += self._draw_selection()
+        self._ball_rects = rects
+        self.screen.set_clip(None)
+
+        if len(restored) + len(self._ball_rects) > MAX_DIRTY_RECTS:
+            return [BOARD_RECT]
+        return restored + self._ball_rects
+
+    # ── Static board layer ────────────────────────────────────────────────────
+
+    def _invalidate_board(self):
+        self._board_layer = None
+
+    def _board_surface(self) -> pygame.Surface:
+        """The drop zone, pegs and bucket strip, rendered once per peg change."""
+        if self._board_layer is None:
+            section = self.profiler.section
+            layer = pygame.Surface((WIDTH, HEIGHT)).convert()
+            layer.fill(BG_COLOR)
+            with section("board_layer/drop_zone"):
+                self._draw_drop_zone(layer)
+            with section("board_layer/pegs"):
+                self._draw_pegs(layer)
+            with section("board_layer/bucket_area"):
+                self._draw_bucket_area(layer)
+            self._board_layer = layer
+        return self._board_layer
+
+    @staticmethod
+    def _make_peg_sprite() -> pygame.Surface:
+        # glow ring with the solid peg on top, centred in a 4r × 4r sprite
+        sprite = pygame.Surface((PEG_RADIUS * 4, PEG_RADIUS * 4), pygame.SRCALPHA)
+        pygame.draw.circle(sprite, (*PEG_GLOW_COLOR[:3], 60),
+                           (PEG_RADIUS * 2, PEG_RADIUS * 2), PEG_RADIUS * 2)
+        pygame.draw.circle(sprite, PEG_COLOR, (PEG_RADIUS * 2, PEG_RADIUS * 2), PEG_RADIUS)
+        return sprite
+
+    def _draw_drop_zone(self, surf: pygame.Surface):
+        rect = pygame.Rect(0, 0, WIDTH, DROP_ZONE_HEIGHT)
+        pygame.draw.rect(surf, DROP_ZONE_COLOR, rect)
+        label = self._text(
+            self.font_small,
+            "Space = drop  •  R = reset ball  •  C = clear pegs  •  X = clear messages",
+            UI_TEXT_COLOR,
+        )
+        surf.blit(label, label.get_rect(center=(WIDTH // 2, DROP_ZONE_HEIGHT // 2)))
+
+    def _draw_pegs(self, surf: pygame.Surface):
+        sprite = self._peg_sprite
+        offset = PEG_RADIUS * 2
+        surf.blits([
+            (sprite, (round(shape.offset.x) - offset, round(shape.offset.y) - offset))
+            for shape in self.pegs
+        ], doreturn=False)
+
+    def _lerp(self, prev_x: float, prev_y: float, pos) -> tuple[int, int]:
+        a = self.alpha
+        return round(prev_x + (pos.x - prev_x) * a), round(prev_y + (pos.y - prev_y) * a)
+
+    def _draw_ball(self) -> list[pygame.Rect]:
+        if self.ball_body is None:
+            return []
+        px, py = self._lerp(*self._prev_ball_pos, self.ball_body.position)
+        rect = pygame.draw.circle(self.screen, BALL_COLOR, (px, py), self.ball_radius)
+        # small highlight
+        hl = pygame.draw.circle(self.screen, (255, 255, 180), (px - 4, py - 4), 4)
+        return [rect.union(hl)]
+
+    def _draw_pool_balls(self) -> list[pygame.Rect]:
+        pool = self.pool
+        rects = []
+        for slot in pool.live:
+            pos = self._lerp(pool.prev_x[slot], pool.prev_y[slot], pool.bodies[slot].position)
+            rects.append(pygame.draw.circle(self.screen, BALL_COLOR, pos, pool.shapes[slot].radius))
+        return rects
+
+    def _draw_ghost(self) -> list[pygame.Rect]:
+        """Predicted path and landing bucket for a drop at the hovered x."""
+        if self._hover_x is None:
+            return []
+        traj = self.preview.request(self._hover_x)
+        points = list(traj.points)
+        if len(points) < 2:
+            return []
+        rects = [pygame.draw.lines(self.screen, GHOST_COLOR, False, points, 2)]
+        end = points[-1]
+        rects.append(pygame.draw.circle(self.screen, GHOST_COLOR, end, self.ball_radius, 1))
+        if traj.done and traj.bucket is not None:
+            left = self.divider_x[traj.bucket - 1] if traj.bucket else 0
+            right = self.divider_x[traj.bucket] if traj.bucket < NUM_BUCKETS - 1 else WIDTH
+            bucket = pygame.Rect(round(left), PEG_AREA_BOTTOM, round(right - left), BUCKET_HEIGHT)
+            rects.append(pygame.draw.rect(self.screen, BUCKET_HIT_COLOR, bucket, 2))
+        return rects
+
+    def _selection_rect(self, end: tuple[int, int]) -> pygame.Rect:
+        (x0, y0), (x1, y1) = self._select_start, end
+        return pygame.Rect(min(x0, x1), min(y0, y1), abs(x1 - x0) + 1, abs(y1 - y0) + 1)
+
+    def _draw_selection(self) -> list[pygame.Rect]:
+        if self._select_start is None:
+            return []
+        rect = self._selection_rect(pygame.mouse.get_pos())
+        return [pygame.draw.rect(self.screen, UI_TEXT_COLOR, rect, 1)]
+
+    def _draw_bucket_area(self, surf: pygame.Surface):
+        bucket_w = WIDTH / NUM_BUCKETS
+        bucket_top = PEG_AREA_BOTTOM  # pygame y=620
+
+        # background strip
+        pygame.draw.rect(
+            surf, (20, 20, 40),
+            pygame.Rect(0, bucket_top, WIDTH, BUCKET_HEIGHT),
+        )
+
+        # dividers
+        for x in self.divider_x:
+            pygame.draw.line(
+                surf, DIVIDER_COLOR,
+                (int(x), bucket_top),
+                (int(x), HEIGHT),
+                2,
+            )
+
+        # bucket labels / highlight
+        for i in range(NUM_BUCKETS):
+            cx = int((i + 0.5) * bucket_w)
+            cy = bucket_top + BUCKET_HEIGHT // 2
+
+            label = self._text(self.font_medium, str(BUCKET_SCORES[i]), BUCKET_LABEL_COLOR)
+            surf.blit(label, label.get_rect(center=(cx, cy)))
+
+    def _draw_ui(self) -> list[pygame.Rect]:
+        """Overlays drawn on top of the board; returns their rects."""
+        if not self.profiler.enabled:
+            return []
+        now = perf_counter_ns() // 1_000_000
+        if self._profile_panel is None or now - self._profile_drawn_at >= PROFILE_REFRESH_MS:
+            self._profile_panel = self._render_profile_panel()
+            self._profile_drawn_at = now
+        return [self.screen.blit(self._profile_panel, PROFILE_POS)]
+
+    def _render_profile_panel(self) -> pygame.Surface:
+        # Rendered straight from the font: the numbers change on every refresh
+        # and would only churn the text cache.
+        font = self.font_tiny
+        lines = [
+            f"FPS {self.clock.get_fps():5.1f}   bodies {len(self.space.bodies)}"
+            f"   shapes {len(self.space.shapes)}",
+            f"substeps {self.sim.substeps}/{self.sim.max_substeps}"
+            f"   tunnelling {self.sim.tunnel_events}",
+            f"{'phase':<24}{'p50 ms':>8}{'p99 ms':>8}",
+        ]
+        for name, s in self.profiler.summary().items():
+            lines.append(f"{name:<24}{s.p50_ms:>8.3f}{s.p99_ms:>8.3f}")
+        surfs = [font.render(line, True, UI_TEXT_COLOR) for line in lines]
+        line_h = font.get_linesize()
+        panel = pygame.Surface((max(s.get_width() for s in surfs) + 12,
+                                line_h * len(surfs) + 8), pygame.SRCALPHA)
+        panel.fill(PROFILE_BG_COLOR)
+        for i, surf in enumerate(surfs):
+            panel.blit(surf, (6, 4 + i * line_h))
+        return panel
+
+    def export_profile(self, path: str):
+        self.profiler.export(path, {
+            "fps":           self.clock.get_fps(),
+            "bodies":        len(self.space.bodies),
+            "shapes":        len(self.space.shapes),
+            "pegs":          len(self.pegs),
+            "tunnel_events": self.sim.tunnel_events,
+        })
+
+    def export_stats(self, path: str):
+        try:
+            self.stats.export(path, self.sim.time, {
+                "pegs":     len(self.pegs),
+                "settings": asdict(self.settings),
+            })
+        except OSError as exc:
+            self._post_message(f"Export failed: {exc.__class__.__name__}")
+            return
+        self._post_message(f"Stats saved to {path}")
+
+    # ── Sidebar rendering ─────────────────────────────────────────────────────
+
+    def _draw_sidebar(self) -> list[pygame.Rect]:
+        """Repaint the sidebar bands whose state changed; returns the dirty rects."""
+        mouse_pos = pygame.mouse.get_pos()
+        hover = tuple(
+            (ctrl["rect_dec"].collidepoint(mouse_pos), ctrl["rect_inc"].collidepoint(mouse_pos))
+            for ctrl in self.settings_controls
+        )
+        bands = [
+            ("messages", SIDEBAR_MESSAGES_RECT, self._draw_sidebar_messages,
+             tuple(self.messages)),
+            ("stats", SIDEBAR_STATS_RECT, self._draw_sidebar_stats, self._stats_band_key()),
+            ("settings", SIDEBAR_SETTINGS_RECT, self._draw_sidebar_settings,
+             (tuple(getattr(self, c["attr"]) for c in self.settings_controls), hover)),
+        ]
+        dirty = []
+        for name, rect, draw_band, key in bands:
+            if not self._full_redraw and self._sidebar_keys.get(name) == key:
+                continue
+            self._sidebar_keys[name] = key
+            # Background fill
+            pygame.draw.rect(self.screen, SIDEBAR_BG_COLOR, rect)
+            # Left-edge border line
+            pygame.draw.line(self.screen, SIDEBAR_BORDER_COLOR,
+                             (SIDEBAR_X, rect.top), (SIDEBAR_X, rect.bottom), 2)
+            with self.profiler.section(f"draw_sidebar/{name}"):
+                draw_band()
+            dirty.append(rect)
+        return dirty
+
+    def _draw_sidebar_messages(self):
+        # Header
+        header = self._text(self.font_small, "MESSAGES", SIDEBAR_HEADER_COLOR)
+        self.screen.blit(header, (SIDEBAR_X + 10, 10))
+        pygame.draw.line(self.screen, SIDEBAR_DIVIDER,
+                         (SIDEBAR_X + 5, 30), (SIDEBAR_X + SIDEBAR_WIDTH - 5, 30), 1)
+
+        # Messages — newest first, fade older entries
+        for i, msg in enumerate(islice(self.messages, SIDEBAR_MESSAGE_LINES)):
+            alpha = max(80, 210 - i * 11)
+            color = (alpha, alpha, min(255, alpha + 40))
+            text = self._text(self.font_tiny, msg, color)
+            self.screen.blit(text, (SIDEBAR_X + 10, 38 + i * 18))
+
+    def _stats_band_key(self) -> tuple | None:
+        # landings can arrive every step; only let the band change a few times a second
+        now = perf_counter_ns() // 1_000_000
+        if self._stats_key is None or now - self._stats_drawn_at >= STATS_REFRESH_MS:
+            self._stats_key = (self.stats.drops, len(self.pool))
+            self._stats_drawn_at = now
+        return self._stats_key
+
+    def _draw_sidebar_stats(self):
+        if self._stats_panel is None or self._stats_panel_key != self._stats_key:
+            self._stats_panel = self._render_stats_panel()
+            self._stats_panel_key = self._stats_key
+        self.screen.blit(self._stats_panel, (SIDEBAR_X + 2, SIDEBAR_STATS_RECT.top))
+
+    def _render_stats_panel(self) -> pygame.Surface:
+        """Summary line, per-bucket bar chart and hit counts on a transparent surface."""
+        # Rendered straight from the font, like the profiler panel: the numbers
+        # change on every refresh and would only churn the text cache.
+        font, stats = self.font_tiny, self.stats
+        panel = pygame.Surface((SIDEBAR_WIDTH - 2, SIDEBAR_STATS_RECT.height), pygame.SRCALPHA)
+        header = font.render(f"STATS  {stats.drops} drops  ({len(self.pool)} in flight)",
+                             True, SIDEBAR_HEADER_COLOR)
+        panel.blit(header, (8, 2))
+        line = (f"mean {stats.mean:.1f}   sd {stats.std:.1f}   "
+                f"{stats.drops_per_second(self.sim.time):.1f}/s")
+        panel.blit(font.render(line, True, SIDEBAR_TEXT_COLOR), (8, 18))
+
+        # bars: all-time share; marker: share over the last stats.window drops
+        shares, recent = stats.shares(), stats.recent_shares()
+        top = max(max(shares), max(recent)) or 1.0
+        col_w = (SIDEBAR_WIDTH - 20) / NUM_BUCKETS
+        bottom = 36 + STATS_CHART_HEIGHT
+        for i in range(NUM_BUCKETS):
+            x = 8 + int(i * col_w) + 2
+            w = int(col_w) - 4
+            h = round(shares[i] / top * STATS_CHART_HEIGHT)
+            if h:
+                pygame.draw.rect(panel, STATS_BAR_COLOR, (x, bottom - h, w, h))
+            if stats.recent_hits[i]:
+                y = bottom - round(recent[i] / top * STATS_CHART_HEIGHT)
+                pygame.draw.line(panel, STATS_RECENT_COLOR, (x, y), (x + w - 1, y), 2)
+
+            hits = stats.hits[i]
+            label = str(hits) if hits < 10_000 else f"{hits // 1000}k"
+            text = font.render(label, True, SIDEBAR_VALUE_COLOR)
+            panel.blit(text, text.get_rect(centerx=8 + int((i + 0.5) * col_w), top=bottom + 2))
+        return panel
+
+    def _draw_sidebar_settings(self):
+        # Header
+        header = self._text(self.font_small, "SETTINGS", SIDEBAR_HEADER_COLOR)
+        self.screen.blit(header, (SIDEBAR_X + 10, 300))
+        pygame.draw.line(self.screen, SIDEBAR_DIVIDER,
+                         (SIDEBAR_X + 5, 320), (SIDEBAR_X + SIDEBAR_WIDTH - 5, 320), 1)
+
+        mouse_pos = pygame.mouse.get_pos()
+
+        for ctrl in self.settings_controls:
+            rect_dec = ctrl["rect_dec"]
+            rect_inc = ctrl["rect_inc"]
+            # row top from dec button's y
+            row_y = rect_dec.y
+
+            # Label + sublabel
+            lbl = self._text(self.font_tiny, ctrl["label"], SIDEBAR_TEXT_COLOR)
+            self.screen.blit(lbl, (SIDEBAR_X + 60, row_y - 2))
+            sub = self._text(self.font_tiny, f"({ctrl['sublabel']})", SIDEBAR_DIVIDER)
+            self.screen.blit(sub, (SIDEBAR_X + 60, row_y + 14))
+
+            # Current value (gold)
+            fmt_val = ctrl["fmt"].format(getattr(self, ctrl["attr"]))
+            val_surf = self._text(self.font_small, fmt_val, SIDEBAR_VALUE_COLOR)
+            self.screen.blit(val_surf, val_surf.get_rect(
+                centerx=SIDEBAR_X + 120, centery=row_y + 15))
+
+            # Dec button
+            dec_color = SIDEBAR_BTN_HOVER if rect_dec.collidepoint(mouse_pos) else SIDEBAR_BTN_COLOR
+            pygame.draw.rect(self.screen, dec_color, rect_dec, border_radius=4)
+            dec_lbl = self._text(self.font_small, "-", SIDEBAR_BTN_TEXT)
+            self.screen.blit(dec_lbl, dec_lbl.get_rect(center=rect_dec.center))
+
+            # Inc button
+            inc_color = SIDEBAR_BTN_HOVER if rect_inc.collidepoint(mouse_pos) else SIDEBAR_BTN_COLOR
+            pygame.draw.rect(self.screen, inc_color, rect_inc, border_radius=4)
+            inc_lbl = self._text(self.font_small, "+", SIDEBAR_BTN_TEXT)
+            self.screen.blit(inc_lbl, inc_lbl.get_rect(center=rect_inc.center))
+
+        self._draw_ball_preview()
+
+    def _draw_ball_preview(self):
+        preview_top = 610
+        pygame.draw.line(self.screen, SIDEBAR_DIVIDER,
+                         (SIDEBAR_X + 5, preview_top), (SIDEBAR_X + SIDEBAR_WIDTH - 5, preview_top), 1)
+        header = self._text(self.font_tiny, "PREVIEW", SIDEBAR_HEADER_COLOR)
+        self.screen.blit(header, header.get_rect(centerx=SIDEBAR_X + SIDEBAR_WIDTH // 2,
+                                                  top=preview_top + 4))
+        cx = SIDEBAR_X + SIDEBAR_WIDTH // 2
+        cy = preview_top + 50
+        r  = self.ball_radius
+        pygame.draw.circle(self.screen, BALL_COLOR, (cx, cy), r)
+        pygame.draw.circle(self.screen, (255, 255, 180), (cx - max(2, r // 3), cy - max(2, r // 3)),
+                           max(2, r // 3))
+
+    # ── Main loop ─────────────────────────────────────────────────────────────
+
+    def run(self):
+        running = True
+        skipped = 0
+        section = self.profiler.section
+        while running:
+            dt = self.clock.tick(self.fps) / 1000.0
+            # a sleeping board costs nothing: block on input instead of ticking
+            events = self._wait_for_events() if self._can_wait() else None
+            if events is not None:
+                dt = 0.0
+            with section("events"):
+                running = self.handle_events(events)
+            self.update(dt)
+            if self.behind and skipped < MAX_FRAME_SKIP:
+                skipped += 1          # spend the next frame on physics instead
+                continue
+            skipped = 0
+            self.draw()
+        self.stop_recording()
+        self.preview.close()
+        if self.profile_out is not None:
+            self.export_profile(self.profile_out)
+        if self.stats_out is not None:
+            self.export_stats(self.stats_out)
+        self.renderer.close()
+        sys.exit()
@@ -0,0 +1,97 @@
+"""Peg layout generators and the on-disk layout format.
+
+A layout is a float32 NumPy array of shape (N, 2) holding peg centres in
+world (screen) coordinates. Files are plain ``.npy`` and are memory-mapped
+on load, so a board of thousands of pegs is read without copying and can go
+straight into :meth:`PlinkoSimulator.add_pegs`.
+"""
+import argparse
+import math
+
+import numpy as np
+
+from simulator import WIDTH, PEG_AREA_TOP, PEG_AREA_BOTTOM, PEG_RADIUS, DROP_ZONE_HEIGHT
+
+DEFAULT_LAYOUT_PATH = "layout.npy"      # what the game's S/L keys save and load
+
+MARGIN = 2 * PEG_RADIUS                   # keep generated pegs off the walls
+TOP    = PEG_AREA_TOP + DROP_ZONE_HEIGHT  # leave room for the ball to fall in
+BOTTOM = PEG_AREA_BOTTOM - 2 * PEG_RADIUS
+
+
+def _rows(row_spacing: float) -> np.ndarray:
+    return np.arange(TOP, BOTTOM, row_spacing, dtype=np.float32)
+
+
+def _row_xs(offset: float, spacing: float) -> np.ndarray:
+    return np.arange(MARGIN + offset, WIDTH - MARGIN, spacing, dtype=np.float32)
+
+
+def staggered(spacing: float = 60, row_spacing: float | None = None) -> np.ndarray:
+    """Full-width rows, every other row shifted by half a column."""
+    row_spacing = row_spacing or spacing
+    rows = []
+    for i, y in enumerate(_rows(row_spacing)):
+        xs = _row_xs(spacing / 2 if i % 2 else 0, spacing)
+        rows.append(np.column_stack([xs, np.full_like(xs, y)]))
+    return np.concatenate(rows) if rows else np.empty((0, 2), np.float32)
+
+
+def hex_grid(spacing: float = 60) -> np.ndarray:
+    """Staggered rows spaced so every peg is ``spacing`` from its six neighbours."""
+    return staggered(spacing, spacing * math.sqrt(3) / 2)
+
+
+def triangular(spacing: float = 60, row_spacing: float | None = None) -> np.ndarray:
+    """Classic Plinko pyramid: row i has i + 1 pegs, centred under the drop zone."""
+    row_spacing = row_spacing or spacing * math.sqrt(3) / 2
+    rows = []
+    for i, y in enumerate(_rows(row_spacing)):
+        xs = WIDTH / 2 + (np.arange(i + 1, dtype=np.float32) - i / 2) * spacing
+        xs = xs[(xs > MARGIN) & (xs < WIDTH - MARGIN)]
+        rows.append(np.column_stack([xs, np.full_like(xs, y)]))
+    return np.concatenate(rows) if rows else np.empty((0, 2), np.float32)
+
+
+GENERATORS = {
+    "staggered":  staggered,
+    "hex":        hex_grid,
+    "triangular": triangular,
+}
+
+
+# ── Serialisation ────────────────────────────────────────────────────────────
+
+def as_layout(positions) -> np.ndarray:
+    """Coerce peg positions (pairs, a PlinkoSimulator's pegs, ...) to (N, 2) float32."""
+    arr = np.asarray(positions, dtype=np.float32)
+    return arr.reshape(-1, 2)
+
+
+def save_layout(path: str, positions):
+    np.save(path, as_layout(positions), allow_pickle=False)
+
+
+def load_layout(path: str) -> np.ndarray:
+    """Memory-map a layout file; raises ValueError if it is not an (N, 2) array."""
+    arr = np.load(path, mmap_mode="r", allow_pickle=False)
+    if arr.ndim != 2 or arr.shape[1] != 2:
+        raise ValueError(f"{path}: expected an (N, 2) peg array, got shape {arr.shape}")
+    return arr
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Generate a Plinko peg layout")
+    parser.add_argument("kind", choices=sorted(GENERATORS))
+    parser.add_argument("-o", "--output", required=True, help="layout file (.npy)")
+    parser.add_argument("--spacing", type=float, default=60)
+    args = parser.parse_args(argv)
+
+    layout = GENERATORS[args.kind](args.spacing)
+    save_layout(args.output, layout)
+    print(f"{args.output}: {len(layout)} pegs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Multi-core Monte Carlo runner for a board's bucket distribution.
+
+N drops are split into fixed-size shards. Each shard draws its drop positions
+from its own ``random.Random`` seeded from ``(seed, shard_index)``, so the
+result depends only on the seed and the shard size, never on the number of
+worker processes or the order in which shards finish.
+"""
+import argparse
+import math
+import os
+import random
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from layouts import load_layout
+from simulator import WIDTH, NUM_BUCKETS, BUCKET_SCORES, PhysicsSettings, PlinkoSimulator
+
+SHARD_SIZE = 1000
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+@dataclass
+class MonteCarloResult:
+    """Aggregate outcome of a batch of drops.
+
+    Drops that never reach a bucket (stuck on pegs, left the board) are
+    counted in ``misses`` and score 0.
+    """
+    drops:  int
+    counts: list[int]           # hits per bucket
+    misses: int
+
+    @property
+    def expected_score(self) -> float:
+        if not self.drops:
+            return 0.0
+        return sum(c * s for c, s in zip(self.counts, BUCKET_SCORES)) / self.drops
+
+    @property
+    def variance(self) -> float:
+        """Sample variance of the per-drop score."""
+        if self.drops < 2:
+            return 0.0
+        mean = self.expected_score
+        sq = sum(c * (s - mean) ** 2 for c, s in zip(self.counts, BUCKET_SCORES))
+        sq += self.misses * mean ** 2
+        return sq / (self.drops - 1)
+
+    def score_interval(self, z: float = 1.96) -> tuple[float, float]:
+        """Normal-approximation confidence interval for the expected score."""
+        if not self.drops:
+            return (0.0, 0.0)
+        half = z * math.sqrt(self.variance / self.drops)
+        return (self.expected_score - half, self.expected_score + half)
+
+    def bucket_intervals(self, z: float = 1.96) -> list[tuple[float, float]]:
+        """Wilson score intervals for each bucket's hit probability."""
+        return [_wilson(c, self.drops, z) for c in self.counts]
+
+    @property
+    def probabilities(self) -> list[float]:
+        return [c / self.drops if self.drops else 0.0 for c in self.counts]
+
+
+def _wilson(k: int, n: int, z: float) -> tuple[float, float]:
+    if not n:
+        return (0.0, 0.0)
+    p = k / n
+    denom  = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    half   = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return (max(0.0, centre - half), min(1.0, centre + half))
+
+
+# ── Worker side ──────────────────────────────────────────────────────────────
+
+_worker_sim: PlinkoSimulator | None = None
+_worker_settings: PhysicsSettings | None = None
+
+
+def _init_worker(pegs: list[tuple[float, float]], settings: PhysicsSettings):
+    """Build the space once per process; every shard reuses it."""
+    global _worker_sim, _worker_settings
+    _worker_sim = PlinkoSimulator.from_settings(pegs, settings)
+    _worker_settings = settings
+
+
+def shard_rng(seed: int, shard_index: int) -> random.Random:
+    return random.Random(f"{seed}:{shard_index}")
+
+
+def drop_counts(sim: PlinkoSimulator, settings: PhysicsSettings,
+                rng: random.Random, n: int) -> list[int]:
+    """Simulate ``n`` drops at uniform x; returns per-bucket counts with misses appended."""
+    r = settings.ball_radius
+    counts = [0] * (NUM_BUCKETS + 1)
+    for _ in range(n):
+        bucket = sim.simulate_drop(rng.uniform(r, WIDTH - r),
+                                   settings.ball_elasticity, r)
+        counts[NUM_BUCKETS if bucket is None else bucket] += 1
+    return counts
+
+
+def _run_shard(seed: int, shard_index: int, n: int) -> list[int]:
+    return drop_counts(_worker_sim, _worker_settings, shard_rng(seed, shard_index), n)
+
+
+# ── Driver ───────────────────────────────────────────────────────────────────
+
+def run_monte_carlo(pegs: Iterable[tuple[float, float]], drops: int,
+                    settings: PhysicsSettings = PhysicsSettings(),
+                    workers: int | None = None, seed: int = 0,
+                    shard_size: int = SHARD_SIZE) -> MonteCarloResult:
+    """Simulate ``drops`` uniformly placed drops on a board with ``pegs``.
+
+    ``workers`` defaults to the CPU count; with one worker the shards run in
+    this process without spawning a pool.
+    """
+    if drops < 0:
+        raise ValueError("drops must not be negative")
+    pegs = [(float(x), float(y)) for x, y in pegs]
+    workers = workers or os.cpu_count() or 1
+    shards = [(seed, i, min(shard_size, drops - start))
+              for i, start in enumerate(range(0, drops, shard_size))]
+
+    if not shards:
+        return MonteCarloResult(0, [0] * NUM_BUCKETS, 0)
+
+    totals = [0] * (NUM_BUCKETS + 1)
+    if workers == 1 or len(shards) == 1:
+        _init_worker(pegs, settings)
+        for counts in map(_run_shard, *zip(*shards)):
+            totals = [a + b for a, b in zip(totals, counts)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(pegs, settings)) as pool:
+            for counts in pool.map(_run_shard, *zip(*shards)):
+                totals = [a + b for a, b in zip(totals, counts)]
+    return MonteCarloResult(drops, totals[:NUM_BUCKETS], totals[NUM_BUCKETS])
+
+
+def format_result(result: MonteCarloResult) -> str:
+    lines = [f"{'bucket':>6} {'score':>6} {'hits':>9} {'p':>7}  95% CI"]
+    for i, (c, (lo, hi)) in enumerate(zip(result.counts, result.bucket_intervals())):
+        p = c / result.drops if result.drops else 0.0
+        lines.append(f"{i:>6} {BUCKET_SCORES[i]:>6} {c:>9} {p:>7.4f}  [{lo:.4f}, {hi:.4f}]")
+    lo, hi = result.score_interval()
+    lines.append(f"misses: {result.misses}")
+    lines.append(f"expected score: {result.expected_score:.3f}  "
+                 f"(variance {result.variance:.1f}, 95% CI [{lo:.3f}, {hi:.3f}])")
+    return "\n".join(lines)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+def main(argv: list[str] | None = None):
+    defaults = PhysicsSettings()
+    parser = argparse.ArgumentParser(description="Monte Carlo bucket distribution for a Plinko board")
+    parser.add_argument("--layout", metavar="FILE", help="peg layout (.npy); default is an empty board")
+    parser.add_argument("-n", "--drops", type=int, default=10_000)
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--elasticity", type=float, default=defaults.ball_elasticity)
+    parser.add_argument("--gravity", type=float, default=defaults.gravity_strength)
+    parser.add_argument("--damping", type=float, default=defaults.damping_val)
+    parser.add_argument("--radius", type=float, default=defaults.ball_radius)
+    args = parser.parse_args(argv)
+    if args.drops < 0:
+        parser.error("--drops must not be negative")
+
+    settings = PhysicsSettings(args.elasticity, args.gravity, args.damping, args.radius)
+    pegs = load_layout(args.layout).tolist() if args.layout else []
+    result = run_monte_carlo(pegs, args.drops, settings, args.workers, args.seed)
+    print(format_result(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+"""Search peg layouts for a target payout.
+
+Simulated annealing over layouts that obey the :meth:`PlinkoSimulator.add_peg`
+rules (inside the peg area, no overlapping pegs). Each iteration:
+
+1. proposes many mutations of the current layout (move, add or remove a peg)
+   and, unless screening is off, ranks them with the fast
+   :class:`predictor.BucketPredictor`;
+2. evaluates the best few with real physics on a pool of headless workers,
+   in chunks of drops, abandoning a candidate as soon as its running loss is
+   worse than annealing could plausibly accept;
+3. applies the Metropolis rule to the best candidate.
+
+Every evaluation uses the same drop positions (common random numbers) and is
+memoised by layout, so revisiting a layout costs nothing. Because the search
+sees only those drops, the best layout is finally re-run on fresh drops
+(``--confirm``) to report its real score. The search stops at the target
+tolerance, after ``patience`` iterations without improvement, or when the
+time limit runs out.
+
+    python optimise.py --target-score 150 -o board.npy
+    python optimise.py --rtp 0.96 --stake 200 -j 8 --time-limit 300 -o board.npy
+    python optimise.py --target-dist .3 .1 .05 .1 .05 .1 .3 --layout start.npy -o board.npy
+"""
+import argparse
+import math
+import os
+import random
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+
+import numpy as np
+
+from layouts import GENERATORS, load_layout, save_layout
+from montecarlo import drop_counts, format_result, run_monte_carlo, shard_rng
+from predictor import BucketPredictor, KernelParams
+from simulator import (
+    WIDTH, NUM_BUCKETS, BUCKET_SCORES, PEG_AREA_TOP, PEG_AREA_BOTTOM, PEG_RADIUS,
+    PegIndex, PhysicsSettings, PlinkoSimulator, peg_in_area,
+)
+
+Layout = tuple[tuple[int, int], ...]   # sorted, whole-pixel peg centres: the memo key
+
+DROPS          = 2000     # physics drops per complete evaluation
+CHUNK          = 250      # drops per worker task; candidates can stop after any chunk
+SCREEN_FACTOR  = 8        # proposals generated per physics-evaluated candidate
+MOVE_SIGMA     = 20.0     # px, std-dev of a peg move
+MOVE_WEIGHTS   = {"move": 0.6, "add": 0.2, "remove": 0.2}
+MISS_WEIGHT    = 0.01     # extra loss per unit miss rate (balls that never land)
+ACCEPT_FLOOR   = 0.01     # candidates less likely than this to be accepted are abandoned
+SIM_CACHE_SIZE = 16       # simulators each worker keeps, one per layout
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class Target:
+    """What the search aims for: a bucket distribution or an expected score."""
+    probs: tuple[float, ...] | None = None
+    score: float | None = None
+
+    def loss(self, counts: list[int], drops: int) -> float:
+        """``counts`` are per-bucket hits with misses appended."""
+        if not drops:
+            return math.inf
+        miss_rate = counts[NUM_BUCKETS] / drops
+        if self.probs is not None:
+            err = sum((c / drops - p) ** 2 for c, p in zip(counts, self.probs))
+        else:
+            score = sum(c * s for c, s in zip(counts, BUCKET_SCORES)) / drops
+            err = ((score - self.score) / self.score) ** 2
+        return err + MISS_WEIGHT * miss_rate
+
+
+@dataclass
+class Evaluation:
+    layout:   Layout
+    counts:   list[int]      # per-bucket hits with misses appended
+    drops:    int
+    loss:     float
+    complete: bool           # False if abandoned early
+
+    @property
+    def score(self) -> float:
+        return sum(c * s for c, s in zip(self.counts, BUCKET_SCORES)) / self.drops
+
+
+def as_key(positions) -> Layout:
+    return tuple(sorted((round(x), round(y)) for x, y in positions))
+
+
+# ── Worker side ──────────────────────────────────────────────────────────────
+
+_worker_settings: PhysicsSettings | None = None
+_worker_sims: OrderedDict[Layout, PlinkoSimulator] = OrderedDict()
+
+
+def _init_worker(settings: PhysicsSettings):
+    global _worker_settings
+    _worker_settings = settings
+    _worker_sims.clear()
+
+
+def _run_chunk(layout: Layout, seed: int, chunk: int, n: int) -> list[int]:
+    """Drops ``n`` balls for chunk ``chunk`` of ``layout``'s evaluation."""
+    sim = _worker_sims.get(layout)
+    if sim is None:
+        sim = PlinkoSimulator.from_settings(layout, _worker_settings)
+        _worker_sims[layout] = sim
+        if len(_worker_sims) > SIM_CACHE_SIZE:
+            _worker_sims.popitem(last=False)
+    else:
+        _worker_sims.move_to_end(layout)
+    return drop_counts(sim, _worker_settings, shard_rng(seed, chunk), n)
+
+
+class _InlineExecutor:
+    """Runs tasks as they are submitted; stands in for the pool with one worker."""
+
+    def submit(self, fn, *args) -> Future:
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def shutdown(self):
+        pass
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+class LayoutOptimiser:
+
+    def __init__(self, target: Target, settings: PhysicsSettings = PhysicsSettings(),
+                 workers: int | None = None, seed: int = 0, drops: int = DROPS,
+                 chunk: int = CHUNK, kernel: KernelParams | None = KernelParams()):
+        self.target   = target
+        self.settings = settings
+        self.workers  = workers or os.cpu_count() or 1
+        self.seed     = seed
+        self.drops    = drops
+        self.chunk    = chunk
+        self.rng      = random.Random(seed)
+        self.memo: dict[Layout, Evaluation] = {}           # complete evaluations
+        self.abandoned: dict[Layout, Evaluation] = {}      # stopped early; can resume
+        self.memo_hits = 0
+        self.drops_run = 0
+        # kernel=None turns screening off
+        self.predictor = (None if kernel is None else
+                          BucketPredictor(PlinkoSimulator().divider_x, settings, kernel))
+
+        if self.workers == 1:
+            self._pool = _InlineExecutor()
+            _init_worker(settings)
+        else:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                             initargs=(settings,))
+
+    def close(self):
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ── Proposals ─────────────────────────────────────────────────────────────
+
+    def mutate(self, layout: Layout) -> Layout | None:
+        """One random move, add or remove that keeps the add_peg rules; None if it failed."""
+        rng = self.rng
+        pegs = list(layout)
+        kind = rng.choices(list(MOVE_WEIGHTS), weights=list(MOVE_WEIGHTS.values()))[0]
+        if not pegs and kind != "add":
+            return None
+        if kind == "remove":
+            pegs.pop(rng.randrange(len(pegs)))
+            return tuple(sorted(pegs))
+
+        if kind == "move":
+            x, y = pegs.pop(rng.randrange(len(pegs)))
+            pos = (round(rng.gauss(x, MOVE_SIGMA)), round(rng.gauss(y, MOVE_SIGMA)))
+        else:
+            pos = (round(rng.uniform(PEG_RADIUS, WIDTH - PEG_RADIUS)),
+                   round(rng.uniform(PEG_AREA_TOP + PEG_RADIUS, PEG_AREA_BOTTOM - PEG_RADIUS)))
+        if not peg_in_area(*pos):
+            return None
+        index = PegIndex()
+        for x, y in pegs:
+            index.insert(x, y, None)
+        if index.any_within(*pos, 2 * PEG_RADIUS):
+            return None
+        pegs.append(pos)
+        return tuple(sorted(pegs))
+
+    def propose(self, layout: Layout, n: int) -> list[Layout]:
+        """Up to ``n`` distinct new layouts, best-predicted first when screening."""
+        want = n * SCREEN_FACTOR if self.predictor is not None else n
+        seen: set[Layout] = {layout}
+        proposals = []
+        for _ in range(want * 4):
+            cand = self.mutate(layout)
+            if cand is not None and cand not in seen:
+                seen.add(cand)
+                proposals.append(cand)
+                if len(proposals) == want:
+                    break
+        if self.predictor is not None:
+            def predicted_loss(cand: Layout) -> float:
+                probs = self.predictor.predict(np.asarray(cand, dtype=np.float64))
+                counts = [p * self.drops for p in probs] + [0]
+                return self.target.loss(counts, self.drops)
+            proposals.sort(key=predicted_loss)
+        return proposals[:n]
+
+    # ── Evaluation ────────────────────────────────────────────────────────────
+
+    def evaluate(self, layouts: list[Layout], bound: float = math.inf) -> list[Evaluation]:
+        """Physics evaluations of ``layouts``, in order.
+
+        Chunks of every candidate run concurrently; a candidate stops early
+        once its loss after a chunk exceeds ``bound``. Complete results are
+        memoised. A candidate stopped early keeps its drops, and a later call
+        with a looser bound resumes it from the next chunk. Chunk ``i`` always
+        uses the same drops, so the resumed result is the same as an
+        uninterrupted one.
+        """
+        results: dict[Layout, Evaluation] = {}
+        running: dict[Future, Layout] = {}
+        partial: dict[Layout, tuple[list[int], int]] = {}
+
+        def submit(layout: Layout, chunk: int):
+            n = min(self.chunk, self.drops - chunk * self.chunk)
+            running[self._pool.submit(_run_chunk, layout, self.seed, chunk, n)] = layout
+
+        for layout in layouts:
+            if layout in self.memo:
+                self.memo_hits += 1
+                results[layout] = self.memo[layout]
+            elif layout in partial:
+                continue
+            elif layout in self.abandoned:
+                ev = self.abandoned[layout]
+                if ev.loss > bound:               # still not worth more drops
+                    self.memo_hits += 1
+                    results[layout] = ev
+                else:
+                    del self.abandoned[layout]
+                    partial[layout] = (ev.counts, ev.drops)
+                    submit(layout, ev.drops // self.chunk)
+            else:
+                partial[layout] = ([0] * (NUM_BUCKETS + 1), 0)
+                submit(layout, 0)
+
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                layout = running.pop(future)
+                chunk_counts = future.result()
+                counts, drops = partial[layout]
+                counts = [a + b for a, b in zip(counts, chunk_counts)]
+                drops += sum(chunk_counts)
+                self.drops_run += sum(chunk_counts)
+                partial[layout] = (counts, drops)
+                loss = self.target.loss(counts, drops)
+                complete = drops >= self.drops
+                if complete:
+                    self.memo[layout] = results[layout] = Evaluation(layout, counts, drops, loss, True)
+                elif loss > bound:
+                    ev = Evaluation(layout, counts, drops, loss, False)
+                    self.abandoned[layout] = results[layout] = ev
+                else:
+                    submit(layout, drops // self.chunk)
+        return [results[layout] for layout in layouts]
+
+    # ── Annealing ─────────────────────────────────────────────────────────────
+
+    def run(self, start, iterations: int = 500, batch: int | None = None,
+            temperature: float | None = None, cooling: float = 0.97,
+            tolerance: float = 1e-4, patience: int = 60,
+            time_limit: float | None = None, log=print) -> Evaluation:
+        """Anneal from the ``start`` positions; returns the best complete evaluation."""
+        batch = batch or 2 * self.workers
+        deadline = None if time_limit is None else time.monotonic() + time_limit
+        current = best = self.evaluate([as_key(start)])[0]
+        T = temperature if temperature is not None else 0.05 * max(current.loss, 1e-6)
+        stale = 0
+
+        for it in range(1, iterations + 1):
+            if best.loss <= tolerance or stale >= patience:
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            # abandon anything Metropolis would accept with < ACCEPT_FLOOR odds
+            bound = current.loss + T * math.log(1 / ACCEPT_FLOOR)
+            evals = [e for e in self.evaluate(self.propose(current.layout, batch), bound)
+                     if e.complete]
+            stale += 1
+            if evals:
+                cand = min(evals, key=lambda e: e.loss)
+                delta = cand.loss - current.loss
+                if delta <= 0 or self.rng.random() < math.exp(-delta / T):
+                    current = cand
+                if cand.loss < best.loss:
+                    best, stale = cand, 0
+            T *= cooling
+            log(f"iter {it:>4}  T {T:.2e}  loss {current.loss:.5f} (best {best.loss:.5f})  "
+                f"score {best.score:7.2f}  pegs {len(best.layout):>3}  "
+                f"evaluated {len(self.memo)}  memo hits {self.memo_hits}  drops {self.drops_run}")
+        return best
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+def main(argv: list[str] | None = None):
+    defaults = PhysicsSettings()
+    parser = argparse.ArgumentParser(description="Search Plinko peg layouts for a target payout")
+    goal = parser.add_mutually_exclusive_group(required=True)
+    goal.add_argument("--target-score", type=float, metavar="SCORE",
+                      help="expected score per drop")
+    goal.add_argument("--rtp", type=float, metavar="FRACTION",
+                      help="return to player, i.e. expected score / --stake")
+    goal.add_argument("--target-dist", type=float, nargs=NUM_BUCKETS, metavar="P",
+                      help="hit probability for each bucket")
+    parser.add_argument("--stake", type=float, default=100, help="score paid per drop, for --rtp")
+    parser.add_argument("-o", "--output", required=True, help="best layout (.npy)")
+    parser.add_argument("--layout", metavar="FILE", help="starting layout (.npy)")
+    parser.add_argument("--start", choices=sorted(GENERATORS), default="hex",
+                        help="generated starting layout if --layout is not given")
+    parser.add_argument("--spacing", type=float, default=90)
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    parser.add_argument("--drops", type=int, default=DROPS, help="physics drops per candidate")
+    parser.add_argument("--batch", type=int, default=None,
+                        help="candidates evaluated per iteration (default 2 per worker)")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--time-limit", type=float, default=None, metavar="SECONDS")
+    parser.add_argument("--patience", type=int, default=60,
+                        help="stop after this many iterations without improvement")
+    parser.add_argument("--tolerance", type=float, default=1e-4,
+                        help="stop once the loss is this small (1e-4 = 1%% score error)")
+    parser.add_argument("--kernel", metavar="FILE",
+                        help="predictor kernel (.json) from 'predictor.py calibrate' for these settings")
+    parser.add_argument("--no-screen", action="store_true",
+                        help="skip ranking proposals with the fast predictor")
+    parser.add_argument("--confirm", type=int, default=20_000, metavar="DROPS",
+                        help="Monte Carlo drops to confirm the best layout (0 to skip)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--elasticity", type=float, default=defaults.ball_elasticity)
+    parser.add_argument("--gravity", type=float, default=defaults.gravity_strength)
+    parser.add_argument("--damping", type=float, default=defaults.damping_val)
+    parser.add_argument("--radius", type=float, default=defaults.ball_radius)
+    args = parser.parse_args(argv)
+    if args.drops < 1:
+        parser.error("--drops must be at least 1")
+    if args.confirm < 0:
+        parser.error("--confirm must not be negative")
+
+    settings = PhysicsSettings(args.elasticity, args.gravity, args.damping, args.radius)
+    if args.target_dist is not None:
+        total = sum(args.target_dist)
+        if min(args.target_dist) < 0 or total <= 0:
+            parser.error("--target-dist needs non-negative probabilities with a positive sum")
+        target = Target(probs=tuple(p / total for p in args.target_dist))
+    else:
+        score = args.target_score if args.target_score is not None else args.rtp * args.stake
+        # the loss is the relative score error, so the target must be positive
+        if score <= 0:
+            parser.error("--target-score, and --rtp times --stake, must be greater than 0")
+        target = Target(score=score)
+    start = load_layout(args.layout).tolist() if args.layout else GENERATORS[args.start](args.spacing).tolist()
+
+    kernel = KernelParams.load(args.kernel) if args.kernel else KernelParams()
+    with LayoutOptimiser(target, settings, args.workers, args.seed, args.drops,
+                         kernel=None if args.no_screen else kernel) as opt:
+        best = opt.run(start, args.iterations, args.batch, tolerance=args.tolerance,
+                       patience=args.patience, time_limit=args.time_limit)
+    save_layout(args.output, best.layout)
+    print(f"{args.output}: {len(best.layout)} pegs, loss {best.loss:.5f}, "
+          f"score {best.score:.2f} over {best.drops} drops")
+
+    if args.confirm:
+        result = run_monte_carlo(best.layout, args.confirm, settings, args.workers, args.seed + 1)
+        print(format_result(result))
+        if args.rtp is not None:
+            print(f"RTP: {result.expected_score / args.stake:.4f} (target {args.rtp})")
+
+
+if __name__ == "__main__":
+    main()
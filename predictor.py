@@ -0,0 +1,271 @@
+"""Fast approximate bucket distribution for a peg layout.
+
+Instead of simulating balls, the predictor pushes a probability density over
+the ball's x position down the board one peg row at a time:
+
+* x is discretised into ``bin_width`` px bins between the walls;
+* in each row, mass within ``reach·R`` of a peg, where R = PEG_RADIUS + ball
+  radius is the contact distance, is deflected to ``peg_x ± shift·R``
+  (mostly towards the side it hit, a coin flip near the peg's centre) and
+  blurred by ``spread·R``;
+* mass that misses the row only diffuses by ``jitter·R``;
+* the walls reflect, and the final density is summed per bucket.
+
+The kernel parameters are fitted against pymunk with ``python predictor.py
+calibrate``. A prediction takes well under a millisecond, about a thousand
+times less than simulating enough drops for the same estimate, so layouts
+can be screened with it and only the best confirmed with
+:func:`montecarlo.run_monte_carlo`.
+"""
+import argparse
+import json
+import math
+import random
+from dataclasses import dataclass, asdict, replace
+
+import numpy as np
+
+from simulator import (
+    WIDTH, NUM_BUCKETS, BUCKET_SCORES, PEG_RADIUS, PhysicsSettings, PlinkoSimulator,
+)
+
+BIN_WIDTH = 2.0           # px per density bin
+ROW_TOL   = PEG_RADIUS    # pegs whose y differ by less than this form one row
+
+
+@dataclass(frozen=True)
+class KernelParams:
+    """Bounce kernel, in units of the contact distance R.
+
+    The defaults were fitted at the default PhysicsSettings; recalibrate for
+    other ball settings.
+    """
+    shift:  float = 3.06  # where a deflected ball ends up, from the peg's centre
+    spread: float = 0.21  # std-dev of the deflected position
+    jitter: float = 0.16  # std-dev of the drift of balls that miss a row
+    coin:   float = 0.03  # offsets below coin·R pick a side at random-ish
+    reach:  float = 1.43  # a ball within reach·R of a peg hits it (>1 blocks narrow gaps)
+
+    def save(self, path: str, settings: PhysicsSettings | None = None):
+        doc = {"kernel": asdict(self)}
+        if settings is not None:
+            doc["settings"] = asdict(settings)
+        with open(path, "w") as f:
+            json.dump(doc, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "KernelParams":
+        with open(path) as f:
+            return cls(**json.load(f)["kernel"])
+
+
+# Search box for calibration, same units as KernelParams
+KERNEL_RANGES = {
+    "shift":  (0.3,  4.0),
+    "spread": (0.05, 2.0),
+    "jitter": (0.01, 0.5),
+    "coin":   (0.02, 1.0),
+    "reach":  (0.8,  2.0),
+}
+
+
+def peg_rows(pegs) -> list[np.ndarray]:
+    """Split (N, 2) peg positions into rows of sorted x, top to bottom."""
+    pegs = np.asarray(pegs, dtype=np.float64).reshape(-1, 2)
+    if not len(pegs):
+        return []
+    pegs = pegs[np.argsort(pegs[:, 1], kind="stable")]
+    ys = pegs[:, 1]
+    # a new row starts wherever y jumps by more than ROW_TOL
+    starts = np.flatnonzero(np.diff(ys) > ROW_TOL) + 1
+    return [np.sort(row[:, 0]) for row in np.split(pegs, starts)]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+class BucketPredictor:
+    """Predicts bucket hit probabilities for layouts under fixed ball settings."""
+
+    def __init__(self, divider_x, settings: PhysicsSettings = PhysicsSettings(),
+                 params: KernelParams = KernelParams(), bin_width: float = BIN_WIDTH):
+        r = settings.ball_radius
+        self.settings = settings
+        self.params   = params
+        self.contact  = PEG_RADIUS + r
+        # bin centres between the walls (a ball's centre stays ≥ r from them)
+        n = max(1, int((WIDTH - 2 * r) / bin_width))
+        self.bin_width = (WIDTH - 2 * r) / n
+        self.centres   = r + (np.arange(n) + 0.5) * self.bin_width
+        edges = np.asarray(divider_x, dtype=np.float64)
+        self.bucket_of_bin = np.searchsorted(edges, self.centres)
+
+        # positions past a wall fold back onto the board: _fold[i + n] is the
+        # bin for unfolded index i, for i in [-n, 2n)
+        fold = np.arange(-n, 2 * n)
+        fold = np.where(fold < 0, -fold - 1, fold)
+        self._fold = np.where(fold >= n, 2 * n - 1 - fold, fold)
+        self._spread = self._gaussian(params.spread * self.contact)
+        self._jitter = self._gaussian(params.jitter * self.contact)
+
+    def _gaussian(self, sigma: float) -> tuple[np.ndarray, np.ndarray]:
+        """Blur kernel plus the gather indices that pad a density for it."""
+        n = len(self.centres)
+        sigma_bins = max(sigma / self.bin_width, 1e-6)
+        half = min(n, max(1, math.ceil(3 * sigma_bins)))
+        kernel = np.exp(-0.5 * (np.arange(-half, half + 1) / sigma_bins) ** 2)
+        # reflect at the walls so no mass leaks off the board
+        return kernel / kernel.sum(), self._fold[np.arange(n - half, 2 * n + half)]
+
+    @staticmethod
+    def _blur(density: np.ndarray, blur: tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+        kernel, pad = blur
+        return np.convolve(density[pad], kernel, mode="valid")
+
+    def _to_bins(self, xs: np.ndarray) -> np.ndarray:
+        n = len(self.centres)
+        idx = ((xs - self.centres[0]) / self.bin_width + (n + 0.5)).astype(np.intp)
+        return self._fold[idx]
+
+    def _row(self, density: np.ndarray, xs: np.ndarray) -> np.ndarray:
+        R, p = self.contact, self.params
+        c = self.centres
+        # nearest peg in this row for every bin
+        peg = xs[np.searchsorted((xs[1:] + xs[:-1]) / 2, c)]
+        d = c - peg
+        hit = np.abs(d) < p.reach * R
+        miss = np.where(hit, 0.0, density)
+        m, d, peg = density[hit], d[hit], peg[hit]
+        if not len(m):
+            return self._blur(miss, self._jitter)
+
+        side = np.where(d >= 0, p.shift * R, -p.shift * R)
+        p_same = np.minimum(1.0, 0.5 + 0.5 * np.abs(d) / (p.coin * R + 1e-9))
+        targets = self._to_bins(np.concatenate([peg + side, peg - side]))
+        weights = np.concatenate([m * p_same, m * (1.0 - p_same)])
+        out = np.bincount(targets, weights=weights, minlength=len(c))
+        return self._blur(out, self._spread) + self._blur(miss, self._jitter)
+
+    def density(self, pegs, drop_x: float | None = None) -> np.ndarray:
+        """Final x density over ``self.centres``; uniform drops unless ``drop_x``."""
+        if drop_x is None:
+            density = np.full(len(self.centres), 1.0 / len(self.centres))
+        else:
+            density = np.zeros(len(self.centres))
+            density[self._to_bins(np.array([drop_x]))[0]] = 1.0
+        for xs in peg_rows(pegs):
+            density = self._row(density, xs)
+        return density
+
+    def predict(self, pegs, drop_x: float | None = None) -> np.ndarray:
+        """Probability of landing in each bucket (sums to 1)."""
+        return np.bincount(self.bucket_of_bin, weights=self.density(pegs, drop_x),
+                           minlength=NUM_BUCKETS)
+
+    def expected_score(self, pegs, drop_x: float | None = None) -> float:
+        return float(self.predict(pegs, drop_x) @ np.asarray(BUCKET_SCORES, dtype=np.float64))
+
+
+# ── Calibration ──────────────────────────────────────────────────────────────
+
+def calibration_layouts() -> dict[str, np.ndarray]:
+    """A spread of generated boards the kernel is fitted on."""
+    from layouts import GENERATORS
+    boards = {}
+    for kind, gen in GENERATORS.items():
+        for spacing in (70, 90, 120):
+            boards[f"{kind}-{spacing}"] = gen(spacing)
+    return boards
+
+
+def _loss(predictor: BucketPredictor, boards, targets) -> float:
+    return sum(float(np.sum((predictor.predict(pegs) - t) ** 2))
+               for pegs, t in zip(boards, targets))
+
+
+def fit_kernel(divider_x, boards: list[np.ndarray], targets: list[np.ndarray],
+               settings: PhysicsSettings = PhysicsSettings(), samples: int = 400,
+               rounds: int = 10, seed: int = 0) -> KernelParams:
+    """Fit by squared error per bucket: random search over KERNEL_RANGES, then
+    coordinate descent from the best sample."""
+    rng = random.Random(seed)
+    best, best_loss = KernelParams(), math.inf
+    for _ in range(samples):
+        cand = KernelParams(**{name: rng.uniform(lo, hi) for name, (lo, hi) in KERNEL_RANGES.items()})
+        loss = _loss(BucketPredictor(divider_x, settings, cand), boards, targets)
+        if loss < best_loss:
+            best, best_loss = cand, loss
+    step = 0.4
+    for _ in range(rounds):
+        for name in asdict(best):
+            for factor in (1 + step, 1 / (1 + step)):
+                cand = replace(best, **{name: getattr(best, name) * factor})
+                loss = _loss(BucketPredictor(divider_x, settings, cand), boards, targets)
+                if loss < best_loss:
+                    best, best_loss = cand, loss
+        step /= 2
+    return best
+
+
+def calibrate(settings: PhysicsSettings = PhysicsSettings(), drops: int = 2000,
+              workers: int | None = None, seed: int = 0) -> tuple[KernelParams, float]:
+    """Fit the kernel to Monte Carlo runs on :func:`calibration_layouts`.
+
+    Returns the fitted parameters and their mean per-board squared error.
+    """
+    from montecarlo import run_monte_carlo
+    divider_x = PlinkoSimulator().divider_x
+    boards, targets = [], []
+    for pegs in calibration_layouts().values():
+        result = run_monte_carlo(pegs.tolist(), drops, settings, workers, seed)
+        landed = drops - result.misses
+        if not landed:
+            continue
+        boards.append(pegs)
+        targets.append(np.asarray(result.counts, dtype=np.float64) / landed)
+    params = fit_kernel(divider_x, boards, targets, settings, seed=seed)
+    error = _loss(BucketPredictor(divider_x, settings, params), boards, targets) / len(boards)
+    return params, error
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+def main(argv: list[str] | None = None):
+    defaults = PhysicsSettings()
+    parser = argparse.ArgumentParser(description="Approximate bucket distribution for a Plinko board")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    cal = sub.add_parser("calibrate", help="fit the bounce kernel against pymunk")
+    cal.add_argument("-o", "--output", required=True, help="kernel file (.json)")
+    cal.add_argument("-n", "--drops", type=int, default=2000, help="Monte Carlo drops per board")
+    cal.add_argument("-j", "--workers", type=int, default=None)
+
+    pred = sub.add_parser("predict", help="predict a layout's bucket distribution")
+    pred.add_argument("--layout", metavar="FILE", required=True)
+    pred.add_argument("--kernel", metavar="FILE", help="fitted kernel (.json)")
+
+    for p in (cal, pred):
+        p.add_argument("--elasticity", type=float, default=defaults.ball_elasticity)
+        p.add_argument("--gravity", type=float, default=defaults.gravity_strength)
+        p.add_argument("--damping", type=float, default=defaults.damping_val)
+        p.add_argument("--radius", type=float, default=defaults.ball_radius)
+    args = parser.parse_args(argv)
+    if args.command == "calibrate" and args.drops < 1:
+        parser.error("--drops must be at least 1")
+    settings = PhysicsSettings(args.elasticity, args.gravity, args.damping, args.radius)
+
+    if args.command == "calibrate":
+        params, error = calibrate(settings, args.drops, args.workers)
+        params.save(args.output, settings)
+        print(f"{args.output}: {params}  (mean squared error {error:.5f} per board)")
+        return
+
+    from layouts import load_layout
+    params = KernelParams.load(args.kernel) if args.kernel else KernelParams()
+    predictor = BucketPredictor(PlinkoSimulator().divider_x, settings, params)
+    pegs = load_layout(args.layout)
+    probs = predictor.predict(pegs)
+    for i, p in enumerate(probs):
+        print(f"{i:>6} {BUCKET_SCORES[i]:>6} {p:>7.4f}")
+    print(f"expected score: {predictor.expected_score(pegs):.3f}")
+
+
+if __name__ == "__main__":
+    main()
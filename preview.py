@@ -0,0 +1,155 @@
+"""Background drop preview: the path a ball dropped at x would take.
+
+A worker thread steps a private PlinkoSimulator built from a snapshot of the
+pegs and settings, so the game's own space is never touched off the main
+thread. Jobs run in short slices and are abandoned as soon as a newer
+request supersedes them; :meth:`TrajectoryPreview.request` never blocks and
+returns the partial path while it grows.
+
+Finished paths are kept in an LRU cache keyed by (quantised x, layout hash,
+elasticity, radius, gravity, damping). :meth:`TrajectoryPreview.set_world`
+drops the cache whenever the pegs or settings change.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from simulator import HEIGHT, STEP_DT, MAX_SUBSTEPS, PhysicsSettings, PlinkoSimulator
+
+PREVIEW_QUANTUM    = 4      # px; drop positions are snapped to this grid
+PREVIEW_CACHE_SIZE = 256    # finished trajectories kept
+PREVIEW_MAX_TIME   = 8.0    # simulated seconds before giving up on a path
+PREVIEW_SLICE      = 30     # steps between cancellation checks
+RECORD_EVERY       = 2      # keep every n-th step's position
+
+
+@dataclass
+class Trajectory:
+    points: list[tuple[float, float]] = field(default_factory=list)
+    bucket: int | None = None
+    done:   bool = False
+
+
+@dataclass
+class _Job:
+    key:        tuple
+    x:          float
+    pegs:       tuple[tuple[float, float], ...]
+    layout:     int                 # hash of pegs
+    settings:   PhysicsSettings
+    trajectory: Trajectory = field(default_factory=Trajectory)
+    cancelled:  bool = False
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+class TrajectoryPreview:
+
+    def __init__(self, step_dt: float = STEP_DT, max_time: float = PREVIEW_MAX_TIME,
+                 cache_size: int = PREVIEW_CACHE_SIZE, max_substeps: int = MAX_SUBSTEPS):
+        self.step_dt      = step_dt
+        self.max_time     = max_time
+        self.cache_size   = cache_size
+        self.max_substeps = max_substeps     # as the session's simulator, so paths match
+        self._cache: OrderedDict[tuple, Trajectory] = OrderedDict()
+        self._pegs: tuple[tuple[float, float], ...] = ()
+        self._layout = hash(self._pegs)
+        self._settings = PhysicsSettings()
+        self._job:  _Job | None = None
+        self._cond  = threading.Condition()
+        self._closed = False
+        # worker-only: simulator for the (layout, gravity, damping) it was built for
+        self._sim: PlinkoSimulator | None = None
+        self._sim_key: tuple | None = None
+        self._thread = threading.Thread(target=self._run, name="trajectory-preview", daemon=True)
+        self._thread.start()
+
+    # ── Main-thread API ───────────────────────────────────────────────────────
+
+    def set_world(self, pegs, settings: PhysicsSettings):
+        """New peg positions and/or settings: cancel the running job, drop the cache."""
+        pegs = tuple(map(tuple, pegs))
+        with self._cond:
+            self._pegs, self._layout, self._settings = pegs, hash(pegs), settings
+            self._cache.clear()
+            if self._job is not None:
+                self._job.cancelled = True
+                self._job = None
+
+    def request(self, x: float) -> Trajectory:
+        """The path for a drop at ``x``: cached, in progress, or just queued."""
+        qx = round(x / PREVIEW_QUANTUM) * PREVIEW_QUANTUM
+        s = self._settings
+        key = (qx, self._layout, s.ball_elasticity, s.ball_radius,
+               s.gravity_strength, s.damping_val)
+        with self._cond:
+            traj = self._cache.get(key)
+            if traj is not None:
+                self._cache.move_to_end(key)
+                return traj
+            job = self._job
+            if job is not None and job.key == key:
+                return job.trajectory
+            if job is not None:
+                job.cancelled = True            # the cursor moved on
+            self._job = _Job(key, qx, self._pegs, self._layout, s)
+            self._cond.notify()
+            return self._job.trajectory
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            if self._job is not None:
+                self._job.cancelled = True
+            self._cond.notify()
+        self._thread.join()
+
+    # ── Worker thread ─────────────────────────────────────────────────────────
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed and (self._job is None or self._job.trajectory.done):
+                    self._cond.wait()
+                if self._closed:
+                    return
+                job = self._job
+            self._compute(job)
+
+    def _sim_for(self, job: _Job) -> PlinkoSimulator:
+        s = job.settings
+        key = (job.layout, s.gravity_strength, s.damping_val)
+        if self._sim_key != key:
+            self._sim = PlinkoSimulator(job.pegs, s.gravity_strength, s.damping_val,
+                                        self.max_substeps)
+            self._sim_key = key
+        return self._sim
+
+    def _compute(self, job: _Job):
+        sim = self._sim_for(job)
+        s = job.settings
+        traj = job.trajectory
+        body, shape = sim.add_ball(job.x, s.ball_elasticity, s.ball_radius)
+        try:
+            for i in range(int(self.max_time / self.step_dt)):
+                if i % PREVIEW_SLICE == 0:
+                    if job.cancelled:
+                        return
+                    time.sleep(0)               # let the main thread have the GIL
+                sim.step(self.step_dt)
+                if i % RECORD_EVERY == 0:
+                    traj.points.append(tuple(body.position))
+                if (shape.scored_bucket is not None or body.position.y > HEIGHT + 50
+                        or body.is_sleeping):
+                    break
+            traj.points.append(tuple(body.position))
+        finally:
+            sim.remove_ball(body, shape)
+        traj.bucket = shape.scored_bucket
+
+        with self._cond:
+            traj.done = True
+            if not job.cancelled:
+                self._cache[job.key] = traj
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
@@ -0,0 +1,137 @@
+"""Low-overhead per-phase frame timing.
+
+Each phase (event handling, a physics step, one draw pass, ...) records its
+duration with ``time.perf_counter_ns`` into a fixed-size ring buffer, so
+the cost per sample is two clock reads and an array store and memory never
+grows. Percentiles are computed from the buffers on demand.
+
+    prof = Profiler()
+    prof.enabled = True
+    with prof.section("physics"):
+        sim.step()
+    prof.summary()["physics"].p99_ms
+"""
+import csv
+import json
+from array import array
+from contextlib import nullcontext
+from dataclasses import dataclass, asdict
+from time import perf_counter_ns
+
+PROFILE_SAMPLES = 1024    # samples kept per phase
+
+_DISABLED = nullcontext()
+
+
+class RingBuffer:
+    """The last ``capacity`` integer samples."""
+
+    __slots__ = ("samples", "capacity", "count")
+
+    def __init__(self, capacity: int = PROFILE_SAMPLES):
+        self.samples  = array("q", bytes(8 * capacity))
+        self.capacity = capacity
+        self.count    = 0                 # samples ever added
+
+    def add(self, value: int):
+        self.samples[self.count % self.capacity] = value
+        self.count += 1
+
+    def values(self) -> array:
+        """Samples currently held (oldest-first order is not preserved)."""
+        return self.samples[:min(self.count, self.capacity)]
+
+    def clear(self):
+        self.count = 0
+
+
+class _Section:
+    """Reusable context manager that times one phase into its ring buffer."""
+
+    __slots__ = ("ring", "start")
+
+    def __init__(self, ring: RingBuffer):
+        self.ring  = ring
+        self.start = 0
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+
+    def __exit__(self, *exc):
+        self.ring.add(perf_counter_ns() - self.start)
+
+
+@dataclass
+class PhaseStats:
+    count:   int      # samples ever recorded
+    p50_ms:  float
+    p99_ms:  float
+    mean_ms: float
+    max_ms:  float
+
+
+def _percentile(ordered: list[int], q: float) -> int:
+    """Nearest-rank percentile of an already sorted, non-empty list."""
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+class Profiler:
+    """Named phase timers; ``section()`` is a no-op while ``enabled`` is False."""
+
+    def __init__(self, capacity: int = PROFILE_SAMPLES, enabled: bool = False):
+        self.capacity = capacity
+        self.enabled  = enabled
+        self.rings:     dict[str, RingBuffer] = {}
+        self._sections: dict[str, _Section]   = {}
+
+    def section(self, name: str):
+        if not self.enabled:
+            return _DISABLED
+        sec = self._sections.get(name)
+        if sec is None:
+            ring = self.rings[name] = RingBuffer(self.capacity)
+            sec  = self._sections[name] = _Section(ring)
+        return sec
+
+    def clear(self):
+        for ring in self.rings.values():
+            ring.clear()
+
+    def summary(self) -> dict[str, PhaseStats]:
+        stats = {}
+        for name, ring in self.rings.items():
+            ordered = sorted(ring.values())
+            if not ordered:
+                continue
+            stats[name] = PhaseStats(
+                count   = ring.count,
+                p50_ms  = _percentile(ordered, 0.50) / 1e6,
+                p99_ms  = _percentile(ordered, 0.99) / 1e6,
+                mean_ms = sum(ordered) / len(ordered) / 1e6,
+                max_ms  = ordered[-1] / 1e6,
+            )
+        return stats
+
+    # ── Export ────────────────────────────────────────────────────────────────
+
+    def export(self, path: str, extra: dict | None = None):
+        """Write the summary to ``path``: CSV if it ends in .csv, JSON otherwise.
+
+        JSON also carries the raw samples (in ns) and any ``extra`` fields.
+        """
+        stats = self.summary()
+        if path.lower().endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["phase", *PhaseStats.__dataclass_fields__])
+                for name, s in stats.items():
+                    writer.writerow([name, *asdict(s).values()])
+            return
+        doc = dict(extra or {})
+        doc["phases"] = {
+            name: {**asdict(s), "samples_ns": self.rings[name].values().tolist()}
+            for name, s in stats.items()
+        }
+        with open(path, "w") as f:
+            json.dump(doc, f, indent=2)
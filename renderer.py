@@ -0,0 +1,132 @@
+"""Window, fonts and text cache for the pygame front end.
+
+Only the pygame modules the game draws with are started (display and font);
+audio, joystick and the rest stay off. ``pygame.font.SysFont`` scans the
+system font list in every new process, so fonts are resolved once and the
+result is remembered in FONT_CACHE_PATH:
+
+* ``PLINKO_FONT`` overrides the lookup: a .ttf/.otf path, or ``default`` for
+  the font bundled with pygame (no lookup at all, the quickest cold start);
+* otherwise the file found for FONT_NAME is cached, or pygame's bundled font
+  is used if the system has none. Delete the cache file to look again.
+
+Only the pygame front end (game.py and this module) imports pygame; the
+simulator, session and headless tools never load it.
+"""
+import json
+import os
+from collections import OrderedDict
+import pygame
+
+FONT_NAME       = "Arial"
+FONT_ENV        = "PLINKO_FONT"
+FONT_CACHE_PATH = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+                               "plinko", "fonts.json")
+TEXT_CACHE_SIZE = 512  # rendered text surfaces kept
+
+# name -> (point size, bold)
+FONT_SIZES = {
+    "large":  (42, True),
+    "medium": (22, True),
+    "small":  (16, False),
+    "tiny":   (13, False),
+}
+
+
+# ── Font resolution ──────────────────────────────────────────────────────────
+
+def _read_cache(path: str) -> dict:
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def _write_cache(path: str, cache: dict):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(cache, f, indent=2)
+    except OSError:
+        pass                            # read-only home: resolve again next time
+
+
+def resolve_fonts(name: str = FONT_NAME, cache_path: str = FONT_CACHE_PATH) -> dict[bool, str | None]:
+    """Font file for ``name`` in regular (False) and bold (True) weight.
+
+    None stands for pygame's bundled font.
+    """
+    override = os.environ.get(FONT_ENV)
+    if override:
+        path = None if override == "default" else override
+        return {False: path, True: path}
+
+    cache = _read_cache(cache_path)
+    found, changed = {}, False
+    for bold in (False, True):
+        key = f"{name}:{'bold' if bold else 'regular'}"
+        if key in cache and (cache[key] is None or os.path.exists(cache[key])):
+            found[bold] = cache[key]
+            continue
+        found[bold] = cache[key] = pygame.font.match_font(name, bold=bold)  # the slow scan
+        changed = True
+    if changed:
+        _write_cache(cache_path, cache)
+    return found
+
+
+def load_fonts(sizes: dict[str, tuple[int, bool]] = FONT_SIZES,
+               name: str = FONT_NAME) -> dict[str, pygame.font.Font]:
+    """One pygame Font per entry of ``sizes``, as SysFont would pick them."""
+    files = resolve_fonts(name)
+    fonts = {}
+    for key, (size, bold) in sizes.items():
+        path = files[bold]
+        font = pygame.font.Font(path, size)
+        # like SysFont: embolden when no bold file was found
+        if bold and (path is None or "bold" not in os.path.basename(path).lower()):
+            font.set_bold(True)
+        fonts[key] = font
+    return fonts
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+class TextCache:
+    """LRU cache of rendered text surfaces keyed by (font, text, colour)."""
+
+    def __init__(self, maxsize: int = TEXT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._surfaces: OrderedDict[tuple, pygame.Surface] = OrderedDict()
+
+    def render(self, font: pygame.font.Font, text: str, color) -> pygame.Surface:
+        key = (font, text, tuple(color))
+        surf = self._surfaces.get(key)
+        if surf is not None:
+            self._surfaces.move_to_end(key)
+            return surf
+        surf = font.render(text, True, color)
+        self._surfaces[key] = surf
+        if len(self._surfaces) > self.maxsize:
+            self._surfaces.popitem(last=False)
+        return surf
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+class Renderer:
+    """The game window plus the fonts and text cache used to draw into it."""
+
+    def __init__(self, size: tuple[int, int], caption: str = "Plinko"):
+        pygame.display.init()
+        pygame.font.init()
+        self.screen = pygame.display.set_mode(size)
+        pygame.display.set_caption(caption)
+        self.fonts = load_fonts()
+        self.text_cache = TextCache()
+
+    def text(self, font: pygame.font.Font, text: str, color) -> pygame.Surface:
+        return self.text_cache.render(font, text, color)
+
+    def close(self):
+        pygame.quit()
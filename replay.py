@@ -0,0 +1,318 @@
+"""Record and replay Plinko sessions.
+
+A log is a small header followed by fixed-size records, appended as the
+session runs::
+
+    header  "<6sBIQB" magic b"PLKLOG", version, physics_hz, rain_seed, max_substeps
+    record  "<IBdd"   step, Event, a, b
+
+Version 1 headers have no max_substeps; those sessions were stepped without
+substeps, so they replay with a cap of 1.
+
+Each record holds the fixed step at which an input was applied (see
+session.Event for what ``a`` and ``b`` mean). Landings are logged too, so a
+headless replay can check that every ball ends in the same bucket.
+
+While replaying, the session is pickled at most every ``snapshot_every``
+steps, and only at steps where no ball is in the space: a pickled pymunk
+space loses its contacts and solver state, so a ball in flight would not
+move the same way after a restore. :meth:`Replayer.seek` restores the
+nearest earlier snapshot and steps forward from there, or replays from the
+start if there is none.
+
+``python replay.py --self-check`` records a short multi-ball session with
+rain, replays it and seeks back to several steps; it exits 1 if any landing
+differs.
+"""
+import argparse
+import bisect
+import os
+import pickle
+import random
+import struct
+import tempfile
+import time
+from dataclasses import dataclass
+
+from session import Event, PlinkoSession, SETTING_ATTRS
+from simulator import WIDTH, MAX_SUBSTEPS
+
+MAGIC     = b"PLKLOG"
+VERSION   = 2
+HEADER_V1 = struct.Struct("<6sBIQ")
+HEADER    = struct.Struct("<6sBIQB")
+RECORD    = struct.Struct("<IBdd")
+
+SNAPSHOT_EVERY = 1800     # fewest steps between replay snapshots (10 s at 180 Hz)
+
+
+# ── Log format ───────────────────────────────────────────────────────────────
+
+class EventLogWriter:
+    """Append-only writer; PlinkoSession.start_recording() takes one of these."""
+
+    def __init__(self, path: str, physics_hz: int, rain_seed: int,
+                 max_substeps: int = MAX_SUBSTEPS):
+        self._file = open(path, "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, physics_hz, rain_seed, max_substeps))
+
+    def write(self, step: int, kind: Event, a: float = 0.0, b: float = 0.0):
+        self._file.write(RECORD.pack(step, kind, a, b))
+
+    def close(self):
+        self._file.close()
+
+
+@dataclass
+class EventLog:
+    physics_hz:   int
+    rain_seed:    int
+    events:       list[tuple[int, Event, float, float]]
+    max_substeps: int = 1
+
+
+def read_log(path: str) -> EventLog:
+    """Read a whole log; raises ValueError if it is not a version 1 or 2 event log."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < HEADER_V1.size:
+        raise ValueError(f"{path}: too short for an event log")
+    magic, version, physics_hz, rain_seed = HEADER_V1.unpack_from(data)
+    if magic != MAGIC or version not in (1, VERSION):
+        raise ValueError(f"{path}: not a version 1 or {VERSION} Plinko event log")
+    header, max_substeps = HEADER_V1, 1
+    if version == VERSION:
+        if len(data) < HEADER.size:
+            raise ValueError(f"{path}: too short for an event log")
+        header = HEADER
+        max_substeps = header.unpack_from(data)[-1]
+    body = memoryview(data)[header.size:]
+    body = body[:len(body) - len(body) % RECORD.size]    # drop a torn last record
+    events = [(step, Event(kind), a, b) for step, kind, a, b in RECORD.iter_unpack(body)]
+    return EventLog(physics_hz, rain_seed, events, max_substeps)
+
+
+# ── Replay ───────────────────────────────────────────────────────────────────
+
+class _LandingCollector:
+    """Stands in for a log writer during replay and keeps only the landings."""
+
+    def __init__(self):
+        self.landings: list[tuple[int, int, int]] = []
+
+    def write(self, step: int, kind: Event, a: float = 0.0, b: float = 0.0):
+        if kind == Event.LANDING:
+            self.landings.append((step, int(a), int(b)))
+
+    def close(self):
+        pass
+
+
+class Replayer:
+    """Drives a headless PlinkoSession from an event log at full speed."""
+
+    def __init__(self, log: EventLog, snapshot_every: int = SNAPSHOT_EVERY):
+        self.log = log
+        self.snapshot_every = snapshot_every
+        self.inputs = [e for e in log.events if e[1] not in (Event.LANDING, Event.END)]
+        self.expected = [(step, int(a), int(b)) for step, kind, a, b in log.events
+                         if kind == Event.LANDING]
+        ends = [step for step, kind, _, _ in log.events if kind == Event.END]
+        self.end_step = ends[-1] if ends else max((e[0] for e in log.events), default=0)
+
+        # (step, index of next input, pickled session), in step order
+        self.snapshots: list[tuple[int, int, bytes]] = []
+        self._restart()
+
+    def _restart(self):
+        self.collector = _LandingCollector()
+        self.session = PlinkoSession(self.log.physics_hz, self.log.rain_seed,
+                                     self.log.max_substeps)
+        self.session.recorder = self.collector
+        self._next = 0
+
+    @property
+    def step(self) -> int:
+        return self.session.sim.steps
+
+    # ── Stepping ──────────────────────────────────────────────────────────────
+
+    def _advance_to(self, step: int):
+        session, sim = self.session, self.session.sim
+        while sim.steps < step:
+            last = self.snapshots[-1][0] if self.snapshots else -self.snapshot_every
+            if sim.steps - last >= self.snapshot_every and not sim.space.bodies:
+                self._snapshot()
+            session.fixed_step()
+
+    def _snapshot(self):
+        """Pickle the session; only call with no balls in the space (see module docs)."""
+        step = self.session.sim.steps
+        if self.snapshots and self.snapshots[-1][0] >= step:
+            return
+        self.snapshots.append((step, self._next, pickle.dumps(self.session)))
+
+    def run(self, until_step: int | None = None):
+        """Apply inputs and step the world up to ``until_step`` (default: the end)."""
+        until = self.end_step if until_step is None else until_step
+        inputs = self.inputs
+        while self._next < len(inputs) and inputs[self._next][0] <= until:
+            self._advance_to(inputs[self._next][0])
+            self._next = self._apply(self._next)
+        self._advance_to(until)
+
+    def _apply(self, i: int) -> int:
+        """Apply input ``i`` (and any records it spans); returns the next index."""
+        session = self.session
+        _, kind, a, b = self.inputs[i]
+        if kind == Event.DROP:
+            session.drop_ball(a)
+        elif kind == Event.PEG_ADD:
+            session.add_peg((a, b))
+        elif kind == Event.PEG_REMOVE:
+            session.remove_nearest_peg((a, b))
+        elif kind == Event.PEG_RECT:
+            _, _, a1, b1 = self.inputs[i + 1]
+            session.remove_pegs_in_rect(a, b, a1, b1)
+            return i + 2
+        elif kind == Event.PEG_CLEAR:
+            session.clear_pegs()
+        elif kind == Event.PEG_LOAD:
+            n = int(a)
+            session.load_pegs([(x, y) for _, _, x, y in self.inputs[i + 1:i + 1 + n]])
+            return i + 1 + n
+        elif kind == Event.RESET:
+            session.reset_ball()
+        elif kind == Event.SETTING:
+            session.set_setting(SETTING_ATTRS[int(a)], b)
+        elif kind == Event.MULTI_BALL:
+            session.set_multi_ball(bool(a))
+        elif kind == Event.RAIN:
+            session.set_raining(bool(a))
+        return i + 1
+
+    def seek(self, step: int):
+        """Jump to ``step``, restoring the nearest snapshot at or before it.
+
+        With no such snapshot the replay starts again from the beginning.
+        """
+        keys = [s for s, _, _ in self.snapshots]
+        i = bisect.bisect_right(keys, step) - 1
+        if step < self.step or (i >= 0 and keys[i] > self.step):
+            if i < 0:
+                self._restart()
+            else:
+                snap_step, self._next, blob = self.snapshots[i]
+                self.session = pickle.loads(blob)
+                self.session.recorder = self.collector
+                self.collector.landings = [l for l in self.collector.landings if l[0] < snap_step]
+        self.run(step)
+
+    # ── Verification ──────────────────────────────────────────────────────────
+
+    def mismatches(self) -> list[tuple[tuple | None, tuple | None]]:
+        """(expected, replayed) landing pairs that differ, up to the current step."""
+        expected = [l for l in self.expected if l[0] < self.step]
+        replayed = self.collector.landings
+        pairs = zip(expected, replayed)
+        diff = [(e, r) for e, r in pairs if e != r]
+        n = min(len(expected), len(replayed))
+        diff += [(e, None) for e in expected[n:]] + [(None, r) for r in replayed[n:]]
+        return diff
+
+
+# ── Self-check ───────────────────────────────────────────────────────────────
+
+def record_check_session(path: str, cycles: int = 4, physics_hz: int = 180, seed: int = 0):
+    """Record a multi-ball session to ``path`` on a staggered board.
+
+    Each 4 s cycle rains for 1.5 s with single drops in between, then resets
+    whatever is left, so the board is empty (and snapshots can be taken) for
+    the last half second.
+    """
+    from layouts import GENERATORS
+
+    session = PlinkoSession(physics_hz, rain_seed=seed)
+    session.start_recording(EventLogWriter(path, physics_hz, session.rain_seed,
+                                           session.sim.max_substeps))
+    session.load_pegs(GENERATORS["staggered"](90))
+    rng = random.Random(seed)
+    cycle = 4 * physics_hz
+    for step in range(cycles * cycle):
+        t = step % cycle
+        if t == 0:
+            session.set_raining(True)
+        elif t == round(1.5 * physics_hz):
+            session.set_raining(False)
+        elif t == round(3.5 * physics_hz):
+            session.reset_ball()
+        if t < 3 * physics_hz and t % 97 == 0:
+            session.drop_ball(rng.uniform(40, WIDTH - 40))
+        session.fixed_step()
+    session.stop_recording()
+
+
+def self_check(snapshot_every: int = 300) -> bool:
+    """Record a session, replay it, then seek back to several steps and replay
+    to the end from each; True if every landing matched every time."""
+    fd, path = tempfile.mkstemp(suffix=".log")
+    os.close(fd)
+    try:
+        record_check_session(path)
+        replayer = Replayer(read_log(path), snapshot_every)
+    finally:
+        os.remove(path)
+    replayer.run()
+    ok = not replayer.mismatches()
+    print(f"full replay: {len(replayer.collector.landings)} landings, "
+          f"{len(replayer.mismatches())} mismatched, {len(replayer.snapshots)} snapshots")
+    end = replayer.end_step
+    # between snapshots, just after one, before the first, and back to the start
+    for step in (end // 2 + 50, replayer.snapshots[-1][0] + 1 if replayer.snapshots else end,
+                 snapshot_every // 2, 0):
+        replayer.seek(step)
+        replayer.run()
+        diff = replayer.mismatches()
+        ok = ok and not diff
+        print(f"seek {step:>5} and run: {len(diff)} mismatched")
+    return ok
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Replay a recorded Plinko session headlessly")
+    parser.add_argument("log", nargs="?")
+    parser.add_argument("--seek", type=int, metavar="STEP",
+                        help="after the full replay, seek back to STEP and replay to the end again")
+    parser.add_argument("--snapshot-every", type=int, default=SNAPSHOT_EVERY, metavar="STEPS")
+    parser.add_argument("--self-check", action="store_true",
+                        help="record a multi-ball session, then check that replay and seek reproduce it")
+    args = parser.parse_args(argv)
+    if args.self_check:
+        raise SystemExit(0 if self_check() else 1)
+    if args.log is None:
+        parser.error("a log file is required")
+
+    replayer = Replayer(read_log(args.log), args.snapshot_every)
+    start = time.perf_counter()
+    replayer.run()
+    wall = time.perf_counter() - start
+    sim_time = replayer.step / replayer.log.physics_hz
+    print(f"replayed {replayer.step} steps ({sim_time:.1f} s simulated) in {wall:.2f} s "
+          f"({sim_time / wall if wall else float('inf'):.0f}x real time)")
+
+    if args.seek is not None:
+        replayer.seek(args.seek)
+        replayer.run()
+        print(f"seeked to step {args.seek} via snapshot and replayed to the end")
+
+    diff = replayer.mismatches()
+    print(f"landings: {len(replayer.collector.landings)} replayed, "
+          f"{len(replayer.expected)} recorded, {len(diff)} mismatched")
+    for expected, replayed in diff[:10]:
+        print(f"  expected {expected}  replayed {replayed}")
+    raise SystemExit(1 if diff else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+"""Headless Plinko game server.
+
+One shared board, stepped under asyncio, serving outcomes over TCP or a Unix
+socket (``python plinko.py --serve``). Each request is one JSON object per
+line, or one msgpack map with ``--format msgpack``. Responses carry the
+request's ``id`` and may arrive out of order.
+
+    {"id": 1, "op": "drop", "x": 400}
+        -> {"id": 1, "ok": true, "bucket": 3, "score": 500}
+    {"id": 2, "op": "batch_drop", "xs": [120, 400, 610]}
+        -> {"id": 2, "ok": true, "buckets": [...], "scores": [...], "total": 750}
+    {"id": 3, "op": "set_layout", "pegs": [[x, y], ...]}
+        -> {"id": 3, "ok": true, "placed": 54}
+    {"id": 4, "op": "set_settings", "settings": {"ball_radius": 12}}
+        -> {"id": 4, "ok": true, "settings": {...}}
+    {"id": 5, "op": "stats"}
+
+Drops behave like ``drop_ball`` in multi-ball mode: every ball in flight
+shares the same physics steps, so concurrent requests from any number of
+clients are coalesced into one batched simulation. A missed ball (timed out
+or left the board) reports bucket null and score 0. ``set_layout`` places
+pegs under the ``add_peg`` rules, skipping any that do not fit.
+``set_settings`` clamps values to the sidebar ranges.
+
+Backpressure: at most ``max_pending`` drops are queued or in flight across
+all clients. Each connection handles at most ``MAX_CONN_INFLIGHT`` requests
+at once, and has at most ``max_pending`` drops waiting, counting every drop
+of a batch. A request's drops are reserved before the task for it is
+created. Past any limit the server stops reading from that socket until
+results drain, so TCP flow control slows the client down. A ``batch_drop``
+larger than ``max_pending`` is rejected outright.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from collections import deque
+
+from simulator import WIDTH, BUCKET_SCORES, BALL_POOL_SIZE, PHYSICS_HZ, MAX_SUBSTEPS
+from session import SETTING_ATTRS, SETTING_RANGES, PlinkoSession
+
+DEFAULT_PORT      = 7477
+MAX_PENDING       = 4 * BALL_POOL_SIZE   # drops queued or in flight, all clients
+MAX_CONN_INFLIGHT = 256                  # concurrent requests per connection
+STEPS_PER_TICK    = 30                   # physics steps between event-loop yields
+MAX_LINE          = 1 << 20              # longest request line (a big set_layout)
+
+
+# ── Wire formats ─────────────────────────────────────────────────────────────
+
+class _NdjsonCodec:
+    def __init__(self, reader: asyncio.StreamReader):
+        self.reader = reader
+
+    async def messages(self):
+        while line := await self.reader.readline():
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError as exc:
+                    yield exc
+
+    @staticmethod
+    def encode(msg: dict) -> bytes:
+        return json.dumps(msg, separators=(",", ":")).encode() + b"\n"
+
+
+class _MsgpackCodec:
+    def __init__(self, reader: asyncio.StreamReader):
+        import msgpack
+        self.reader = reader
+        self._unpacker = msgpack.Unpacker()
+        self._packb = msgpack.packb
+
+    async def messages(self):
+        while data := await self.reader.read(65536):
+            self._unpacker.feed(data)
+            for msg in self._unpacker:
+                yield msg
+
+    def encode(self, msg: dict) -> bytes:
+        return self._packb(msg)
+
+
+CODECS = {"ndjson": _NdjsonCodec, "msgpack": _MsgpackCodec}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+class PlinkoServer:
+
+    def __init__(self, session: PlinkoSession | None = None, max_pending: int = MAX_PENDING):
+        self.session = session or PlinkoSession(rain_seed=0)
+        self.session.set_multi_ball(True)
+        self._queue: deque[tuple[float, asyncio.Future]] = deque()    # waiting for a slot
+        self._waiting: dict[int, asyncio.Future] = {}                  # pool slot -> result
+        self._capacity = asyncio.Semaphore(max_pending)
+        self.max_pending = max_pending
+        self._wake = asyncio.Event()
+        self.drops_served = 0
+        self.steps_run    = 0
+
+    # ── Requests ──────────────────────────────────────────────────────────────
+
+    async def drop(self, x: float) -> int | None:
+        """Queue a drop at ``x`` and wait for its bucket (None for a miss)."""
+        if not 0 <= x <= WIDTH:
+            raise ValueError(f"x must be within 0..{WIDTH}")
+        async with self._capacity:
+            future = asyncio.get_running_loop().create_future()
+            self._queue.append((x, future))
+            self._wake.set()
+            return await future
+
+    async def batch_drop(self, xs: list[float]) -> list[int | None]:
+        """Drop every x in ``xs`` and wait for all the buckets; at most
+        ``max_pending`` drops, since each one is a task waiting on the queue."""
+        self._check_batch(len(xs))
+        xs = [float(x) for x in xs]
+        if not all(0 <= x <= WIDTH for x in xs):       # reject before queueing any
+            raise ValueError(f"every x must be within 0..{WIDTH}")
+        return await asyncio.gather(*(self.drop(x) for x in xs))
+
+    def _check_batch(self, n: int):
+        if not 0 <= n <= self.max_pending:
+            raise ValueError(f"a batch holds at most {self.max_pending} drops")
+
+    def batch_size(self, req: dict) -> int:
+        """Drops a ``batch_drop`` request asks for: ``len(xs)``, or ``n``."""
+        xs = req.get("xs")
+        if xs is not None:
+            if not isinstance(xs, list):
+                raise TypeError("xs must be a list")
+            n = len(xs)
+        else:
+            n = req["n"]
+            if (isinstance(n, bool) or not isinstance(n, (int, float))
+                    or not math.isfinite(n) or n != int(n)):
+                raise ValueError("n must be a whole number")
+            n = int(n)
+        self._check_batch(n)
+        return n
+
+    def set_layout(self, pegs: list[list[float]]) -> int:
+        return self.session.load_pegs([(float(x), float(y)) for x, y in pegs])
+
+    def set_settings(self, values: dict) -> dict:
+        if not isinstance(values, dict):
+            raise TypeError("settings must be an object")
+        for attr, value in values.items():
+            if attr not in SETTING_RANGES:
+                raise KeyError(f"unknown setting {attr!r}")
+            lo, hi = SETTING_RANGES[attr]
+            self.session.set_setting(attr, min(hi, max(lo, float(value))))
+        return {attr: getattr(self.session, attr) for attr in SETTING_ATTRS}
+
+    def stats(self) -> dict:
+        return {
+            "drops_served":  self.drops_served,
+            "in_flight":     len(self.session.pool),
+            "queued":        len(self._queue),
+            "steps":         self.steps_run,
+            "pegs":          len(self.session.pegs),
+            "bucket_hits":   list(self.session.bucket_hits),
+            "tunnel_events": self.session.sim.tunnel_events,
+            "outcomes":      self.session.stats.summary(self.session.sim.time),
+        }
+
+    async def dispatch(self, req: dict) -> dict:
+        op = req["op"]
+        if op == "drop":
+            bucket = await self.drop(float(req.get("x", WIDTH / 2)))
+            return {"bucket": bucket, "score": _score(bucket)}
+        if op == "batch_drop":
+            n = self.batch_size(req)              # before building any list
+            xs = req.get("xs")
+            if xs is None:
+                rng = random.Random(req.get("seed"))
+                r = self.session.ball_radius
+                xs = [rng.uniform(r, WIDTH - r) for _ in range(n)]
+            buckets = await self.batch_drop(xs)
+            scores = [_score(b) for b in buckets]
+            return {"buckets": buckets, "scores": scores, "total": sum(scores)}
+        if op == "set_layout":
+            return {"placed": self.set_layout(req["pegs"])}
+        if op == "set_settings":
+            return {"settings": self.set_settings(req["settings"])}
+        if op == "stats":
+            return self.stats()
+        raise ValueError(f"unknown op {op!r}")
+
+    # ── Physics ───────────────────────────────────────────────────────────────
+
+    async def physics(self):
+        """Step the board while balls are queued or in flight; sleep otherwise."""
+        session, pool = self.session, self.session.pool
+        while True:
+            if not self._queue and not len(pool):
+                self._wake.clear()
+                await self._wake.wait()
+            for _ in range(STEPS_PER_TICK):
+                self._spawn_queued()
+                for slot, bucket in session.fixed_step():
+                    future = self._waiting.pop(slot, None)
+                    if future is not None and not future.done():
+                        future.set_result(bucket if bucket >= 0 else None)
+                self.steps_run += 1
+                if not len(pool) and not self._queue:
+                    break
+            await asyncio.sleep(0)
+
+    def _spawn_queued(self):
+        queue, free = self._queue, self.session.pool.free
+        while queue and free:
+            x, future = queue.popleft()
+            if future.done():                 # client went away
+                continue
+            self._waiting[self.session.drop_ball(x)] = future
+            self.drops_served += 1
+
+    # ── Connections ───────────────────────────────────────────────────────────
+
+    def _drop_cost(self, req) -> int:
+        """Drop tasks ``req`` will create; 0 for requests that will be rejected."""
+        if not isinstance(req, dict):
+            return 0
+        op = req.get("op")
+        if op == "drop":
+            return 1
+        if op == "batch_drop":
+            try:
+                return self.batch_size(req)
+            except Exception:
+                return 0                        # dispatch reports the error
+        return 0
+
+    def handler(self, fmt: str = "ndjson"):
+        codec_type = CODECS[fmt]
+
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            codec = codec_type(reader)
+            inflight = asyncio.Semaphore(MAX_CONN_INFLIGHT)
+            # drops this connection may have waiting; only this loop acquires,
+            # so taking a batch's permits one at a time cannot deadlock
+            budget = asyncio.Semaphore(self.max_pending)
+            tasks: set[asyncio.Task] = set()
+            try:
+                async for req in codec.messages():
+                    await inflight.acquire()
+                    cost = self._drop_cost(req)
+                    for _ in range(cost):
+                        await budget.acquire()
+                    task = asyncio.create_task(
+                        self._respond(req, codec, writer, inflight, budget, cost))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                if tasks:
+                    await asyncio.gather(*tasks, return_exceptions=True)
+            except ConnectionError:
+                pass
+            finally:
+                for task in tasks:
+                    task.cancel()
+                writer.close()
+
+        return handle
+
+    async def _respond(self, req, codec, writer: asyncio.StreamWriter,
+                       inflight: asyncio.Semaphore, budget: asyncio.Semaphore, cost: int):
+        try:
+            if isinstance(req, Exception):
+                raise ValueError(f"bad request: {req}")
+            if not isinstance(req, dict):
+                raise ValueError("request must be an object")
+            resp = {"ok": True, **await self.dispatch(req)}
+        except (KeyError, TypeError, ValueError) as exc:
+            resp = {"ok": False, "error": str(exc)}
+        except Exception as exc:                  # whatever went wrong, the client gets an answer
+            resp = {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+        finally:
+            inflight.release()
+            for _ in range(cost):
+                budget.release()
+        if isinstance(req, dict) and "id" in req:
+            resp["id"] = req["id"]
+        writer.write(codec.encode(resp))
+        await writer.drain()
+
+
+def _score(bucket: int | None) -> int:
+    return 0 if bucket is None else BUCKET_SCORES[bucket]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+async def serve(host: str = "127.0.0.1", port: int = DEFAULT_PORT, unix: str | None = None,
+                fmt: str = "ndjson", layout_path: str | None = None,
+                physics_hz: int = PHYSICS_HZ, max_pending: int = MAX_PENDING,
+                max_substeps: int = MAX_SUBSTEPS):
+    session = PlinkoSession(physics_hz, rain_seed=0, max_substeps=max_substeps)
+    if layout_path is not None:
+        from layouts import load_layout
+        session.load_pegs(load_layout(layout_path))
+    server = PlinkoServer(session, max_pending)
+    if unix is not None:
+        listener = await asyncio.start_unix_server(server.handler(fmt), unix, limit=MAX_LINE)
+        where = unix
+    else:
+        listener = await asyncio.start_server(server.handler(fmt), host, port, limit=MAX_LINE)
+        where = f"{host}:{port}"
+    print(f"serving {fmt} on {where} ({len(session.pegs)} pegs)", flush=True)
+    physics = asyncio.create_task(server.physics())
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        physics.cancel()
+
+
+async def load_test(host: str = "127.0.0.1", port: int = DEFAULT_PORT, unix: str | None = None,
+                    clients: int = 16, drops: int = 1000, seed: int = 0):
+    """Open ``clients`` NDJSON connections, each pipelining ``drops`` drops."""
+    latencies: list[float] = []
+
+    async def client(index: int):
+        if unix is not None:
+            reader, writer = await asyncio.open_unix_connection(unix, limit=MAX_LINE)
+        else:
+            reader, writer = await asyncio.open_connection(host, port, limit=MAX_LINE)
+        rng = random.Random(f"{seed}:{index}")
+        sent: dict[int, float] = {}
+
+        async def send():
+            for i in range(drops):
+                sent[i] = time.perf_counter()
+                req = {"id": i, "op": "drop", "x": rng.uniform(30, WIDTH - 30)}
+                writer.write(_NdjsonCodec.encode(req))
+                await writer.drain()
+
+        sender = asyncio.create_task(send())
+        for _ in range(drops):
+            resp = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - sent.pop(resp["id"]))
+        await sender
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    wall = time.perf_counter() - start
+    latencies.sort()
+    total = clients * drops
+    print(f"{total} drops from {clients} clients in {wall:.2f} s: {total / wall:.0f} drops/s, "
+          f"latency p50 {latencies[total // 2] * 1e3:.1f} ms, "
+          f"p99 {latencies[min(total - 1, int(total * 0.99))] * 1e3:.1f} ms")
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--format", choices=sorted(CODECS), default="ndjson",
+                        help="wire format (msgpack needs the msgpack package)")
+    parser.add_argument("--max-pending", type=int, default=MAX_PENDING,
+                        help="drops queued or in flight before clients are pushed back")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Load-test a running Plinko server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", metavar="PATH")
+    parser.add_argument("-c", "--clients", type=int, default=16)
+    parser.add_argument("-n", "--drops", type=int, default=1000, help="drops per client")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    asyncio.run(load_test(args.host, args.port, args.unix, args.clients, args.drops, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""Plinko game rules without rendering or input.
+
+PlinkoSession owns the simulator, the single ball, the multi-ball pool, rain,
+the sidebar settings and scoring. PlinkoGame adds pygame input and drawing on
+top; replays and other headless front ends drive a PlinkoSession directly.
+
+Every input that changes the world goes through a method here, so attaching
+a recorder (see replay.py) captures a session completely.
+"""
+import random
+from collections import deque
+from dataclasses import fields
+from enum import IntEnum
+import pymunk
+
+from simulator import (
+    WIDTH, HEIGHT, BALL_RADIUS, BUCKET_SCORES, GRAVITY, DAMPING,
+    PHYSICS_HZ, MAX_SUBSTEPS, BallPool, PhysicsSettings, PlinkoSimulator,
+    ELASTICITY_MIN, ELASTICITY_MAX, GRAVITY_MIN, GRAVITY_MAX,
+    DAMPING_MIN, DAMPING_MAX, BALL_RADIUS_MIN, BALL_RADIUS_MAX,
+)
+from stats import SessionStats
+
+MAX_MESSAGES = 12
+RAIN_RATE    = 240        # pooled balls released per second while raining
+
+# Settings a session input can change, in PhysicsSettings field order
+SETTING_ATTRS = [f.name for f in fields(PhysicsSettings)]
+
+# Allowed (min, max) for each setting, as enforced by the sidebar buttons
+SETTING_RANGES = {
+    "ball_elasticity":  (ELASTICITY_MIN, ELASTICITY_MAX),
+    "gravity_strength": (GRAVITY_MIN, GRAVITY_MAX),
+    "damping_val":      (DAMPING_MIN, DAMPING_MAX),
+    "ball_radius":      (BALL_RADIUS_MIN, BALL_RADIUS_MAX),
+}
+
+
+class Event(IntEnum):
+    """Session inputs (and outcomes) as written to an event log."""
+    DROP        = 1       # a = x
+    PEG_ADD     = 2       # a, b = position
+    PEG_REMOVE  = 3       # a, b = click position (nearest peg)
+    PEG_RECT    = 4       # sent twice: first corner, then opposite corner
+    PEG_CLEAR   = 5
+    PEG_LOAD    = 6       # a = n; the next n PEG_ADD events are one bulk insert
+    RESET       = 7
+    SETTING     = 8       # a = index into SETTING_ATTRS, b = new value
+    MULTI_BALL  = 9       # a = 0/1
+    RAIN        = 10      # a = 0/1
+    LANDING     = 11      # outcome: a = bucket, b = pool slot or -1
+    END         = 12      # end of the recording
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+class PlinkoSession:
+
+    def __init__(self, physics_hz: int = PHYSICS_HZ, rain_seed: int | None = None,
+                 max_substeps: int = MAX_SUBSTEPS):
+        # headless physics world (walls, buckets, pegs, bucket sensors)
+        self.sim = PlinkoSimulator(gravity=GRAVITY[1], damping=DAMPING,
+                                   max_substeps=max_substeps)
+        self.sim.on_bucket_hit = self._on_bucket_hit
+        self.space = self.sim.space
+        self.divider_x = self.sim.divider_x
+        self.step_dt = 1.0 / physics_hz
+        self._tunnels_reported    = 0             # sim.tunnel_events already posted
+        self._tunnels_report_step = -physics_hz   # step of the last such message
+
+        # game state
+        self.pegs = self.sim.pegs
+        self.ball_body:  pymunk.Body  | None = None
+        self.ball_shape: pymunk.Shape | None = None
+        self.score:          int | None = None
+        self.scored_bucket:  int | None = None
+        self.ball_settled = False       # the single ball has come to rest (asleep)
+        self.ball_counted = False       # its outcome is in stats (landed or missed)
+
+        # multi-ball mode: many balls in flight, recycled through a pool
+        self.pool = BallPool(self.sim)
+        self.multi_ball = False
+        self.raining    = False
+        self.rain_seed  = random.randrange(2 ** 63) if rain_seed is None else rain_seed
+        self.rain_rng   = random.Random(self.rain_seed)
+        self._rain_credit = 0.0
+        # outcome statistics; they survive resets and only clear_stats() zeroes them
+        self.stats = SessionStats()
+        self.bucket_hits = self.stats.hits                  # landings per bucket
+
+        # sidebar state
+        self.messages: deque[str] = deque(maxlen=MAX_MESSAGES)
+        self.ball_elasticity  = 0.75
+        self.gravity_strength = 900
+        self.damping_val      = 0.99
+        self.ball_radius      = BALL_RADIUS
+
+        # event log writer with write(step, kind, a, b), see replay.EventLogWriter
+        self.recorder = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["recorder"] = None       # snapshots never carry the open log
+        return state
+
+    # ── Recording ─────────────────────────────────────────────────────────────
+
+    def _record(self, kind: Event, a: float = 0.0, b: float = 0.0):
+        if self.recorder is not None:
+            self.recorder.write(self.sim.steps, kind, a, b)
+
+    def start_recording(self, recorder):
+        """Attach ``recorder`` and write the current pegs and settings to it."""
+        self.recorder = recorder
+        self._record(Event.PEG_CLEAR)
+        self._record_peg_load()
+        for i, attr in enumerate(SETTING_ATTRS):
+            self._record(Event.SETTING, i, getattr(self, attr))
+        self._record(Event.MULTI_BALL, self.multi_ball)
+        self._record(Event.RAIN, self.raining)
+
+    def _record_peg_load(self):
+        positions = self.sim.peg_positions()
+        self._record(Event.PEG_LOAD, len(positions))
+        for x, y in positions:
+            self._record(Event.PEG_ADD, x, y)
+
+    def stop_recording(self):
+        if self.recorder is not None:
+            self._record(Event.END)
+            self.recorder.close()
+            self.recorder = None
+
+    # ── Scoring ───────────────────────────────────────────────────────────────
+
+    def _on_bucket_hit(self, ball_shape: pymunk.Shape, bucket_index: int):
+        slot = getattr(ball_shape, "slot", None)
+        if ball_shape is self.ball_shape:
+            self.scored_bucket = bucket_index
+            self.score = BUCKET_SCORES[bucket_index]
+            # a ball already counted as stuck keeps that outcome if a wake frees it
+            if not self.ball_counted:
+                self.ball_counted = True
+                self.stats.record(bucket_index, self.sim.time)
+        else:
+            if slot is not None:
+                self.pool.on_bucket_hit(ball_shape, bucket_index)
+            self.stats.record(bucket_index, self.sim.time)
+        self._record(Event.LANDING, bucket_index, -1 if slot is None else slot)
+
+    def clear_stats(self):
+        self.stats.clear()
+        self._post_message("Statistics cleared")
+
+    # ── Message log ───────────────────────────────────────────────────────────
+
+    def _post_message(self, text: str):
+        self.messages.appendleft(text)  # newest at top
+
+    # ── Peg management ────────────────────────────────────────────────────────
+
+    def _pegs_changed(self):
+        """Hook for front ends that cache anything derived from the pegs."""
+
+    def add_peg(self, pos: tuple[float, float]):
+        self._record(Event.PEG_ADD, *pos)
+        if self.sim.add_peg(pos):
+            self._pegs_changed()
+            self._post_message("Peg placed")
+
+    def remove_nearest_peg(self, pos: tuple[float, float]):
+        self._record(Event.PEG_REMOVE, *pos)
+        shape = self.sim.nearest_peg(pos)
+        if shape is not None:
+            self.sim.remove_peg(shape)
+            self._pegs_changed()
+            self._post_message("Peg removed")
+
+    def remove_pegs_in_rect(self, x0: float, y0: float, x1: float, y1: float):
+        self._record(Event.PEG_RECT, x0, y0)
+        self._record(Event.PEG_RECT, x1, y1)
+        shapes = self.sim.pegs_in_rect(x0, y0, x1, y1)
+        for shape in shapes:
+            self.sim.remove_peg(shape)
+        if shapes:
+            self._pegs_changed()
+            self._post_message(f"Removed {len(shapes)} pegs")
+
+    def clear_pegs(self):
+        self._record(Event.PEG_CLEAR)
+        self.sim.clear_pegs()
+        self._pegs_changed()
+        self._post_message("All pegs cleared")
+
+    def load_pegs(self, positions) -> int:
+        """Replace the board with ``positions``; returns how many pegs were placed."""
+        self._record(Event.PEG_CLEAR)
+        self.sim.clear_pegs()
+        placed = self.sim.add_pegs(positions)
+        self._record_peg_load()
+        self._pegs_changed()
+        self._post_message(f"Loaded {placed} pegs")
+        return placed
+
+    # ── Ball management ───────────────────────────────────────────────────────
+
+    def drop_ball(self, x: float) -> int | None:
+        """Drop a ball at ``x``; in multi-ball mode returns its pool slot (None if full)."""
+        self._record(Event.DROP, x)
+        if self.multi_ball:
+            slot = self.pool.spawn(x, self.ball_elasticity, self.ball_radius)
+            if slot is None:
+                self._post_message("Ball pool full")
+            else:
+                self._post_message("Ball dropped")
+            return slot
+        self._remove_ball()
+        body, shape = self.sim.add_ball(x, self.ball_elasticity, self.ball_radius)
+        self.ball_body  = body
+        self.ball_shape = shape
+        self._post_message("Ball dropped")
+
+    def reset_ball(self):
+        self._record(Event.RESET)
+        if len(self.pool):
+            # balls still in flight are misses, as a reset single ball is
+            for slot in sorted(self.pool.live):
+                if self.pool.scored[slot] < 0:
+                    self.stats.record(-1, self.sim.time)
+            self.pool.clear()
+            self._post_message("Balls reset")
+        if self.ball_body is not None:
+            self._post_message("Ball reset")
+        self._remove_ball()
+
+    def _remove_ball(self):
+        if self.ball_body is not None:
+            # fell out, or reset or replaced before it landed: a miss, as in the pool
+            if not self.ball_counted:
+                self.stats.record(-1, self.sim.time)
+            self.sim.remove_ball(self.ball_body, self.ball_shape)
+            self.ball_body  = None
+            self.ball_shape = None
+        self.score         = None
+        self.scored_bucket = None
+        self.ball_settled  = False
+        self.ball_counted  = False
+
+    # ── Settings and modes ────────────────────────────────────────────────────
+
+    def set_setting(self, attr: str, value: float):
+        """Change one of SETTING_ATTRS; gravity and damping apply immediately."""
+        self._record(Event.SETTING, SETTING_ATTRS.index(attr), value)
+        setattr(self, attr, value)
+        # apply live physics changes
+        self.sim.set_gravity(self.gravity_strength)
+        self.sim.set_damping(self.damping_val)
+
+    @property
+    def settings(self) -> PhysicsSettings:
+        return PhysicsSettings(*(getattr(self, attr) for attr in SETTING_ATTRS))
+
+    def set_multi_ball(self, on: bool):
+        self._record(Event.MULTI_BALL, on)
+        self.multi_ball = on
+        self.raining = self.raining and on
+        self._post_message(f"Multi-ball: {'on' if on else 'off'}")
+
+    def set_raining(self, on: bool):
+        self._record(Event.RAIN, on)
+        self.raining = on
+        self.multi_ball = self.multi_ball or on
+        self._post_message(f"Rain: {'on' if on else 'off'}")
+
+    # ── Physics ───────────────────────────────────────────────────────────────
+
+    def fixed_step(self) -> list[tuple[int, int]]:
+        """One physics step; returns the pooled balls it retired, as BallPool.collect() does."""
+        if self.raining:
+            self._rain_credit += RAIN_RATE * self.step_dt
+            r = self.ball_radius
+            while self._rain_credit >= 1:
+                self._rain_credit -= 1
+                if self.pool.spawn(self.rain_rng.uniform(r, WIDTH - r),
+                                   self.ball_elasticity, r) is None:
+                    self._rain_credit = 0.0
+                    break
+        self.sim.step(self.step_dt)
+        finished = self.pool.collect()
+        for _, bucket in finished:
+            if bucket < 0:
+                self.stats.record(-1, self.sim.time)
+        if self.sim.tunnel_events != self._tunnels_reported:
+            self._report_tunnels()
+
+        # Remove ball if it falls below bottom of screen
+        if self.ball_body is not None:
+            by = self.ball_body.position.y
+            if by > HEIGHT + 50:
+                self._post_message("Ball fell out")
+                self._remove_ball()
+            else:
+                self._check_settled()
+        return finished
+
+    def _report_tunnels(self):
+        # at most one message per simulated second
+        if self.sim.steps - self._tunnels_report_step < round(1 / self.step_dt):
+            return
+        new = self.sim.tunnel_events - self._tunnels_reported
+        self._post_message(f"Tunnelling x{new} (substep cap {self.sim.max_substeps})")
+        self._tunnels_reported    = self.sim.tunnel_events
+        self._tunnels_report_step = self.sim.steps
+
+    def _check_settled(self):
+        # PlinkoSimulator._settle() puts the ball to sleep once it has been at
+        # rest for SETTLE_TIME; it stays frozen until a setting or peg change wakes it
+        settled = self.ball_body.is_sleeping
+        if settled and not self.ball_settled:
+            if self.scored_bucket is None:
+                self._post_message("Ball stuck")
+                if not self.ball_counted:
+                    self.ball_counted = True
+                    self.stats.record(-1, self.sim.time)
+            else:
+                self._post_message(f"Ball settled in bucket {self.scored_bucket}")
+        self.ball_settled = settled
+
+    @property
+    def idle(self) -> bool:
+        """Nothing would move in the next step: no rain and every ball asleep."""
+        return not self.raining and self.sim.asleep
+
+    def advance_to(self, step: int):
+        """Run fixed steps until the simulator has taken ``step`` of them."""
+        while self.sim.steps < step:
+            self.fixed_step()
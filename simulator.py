@@ -0,0 +1,599 @@
+"""Headless Plinko physics.
+
+The pymunk world (walls, bucket dividers, bucket sensors and pegs) lives here
+so it can be stepped without a window. World coordinates are screen
+coordinates: x grows to the right, y grows downwards and gravity is positive.
+"""
+import math
+from array import array
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+import pymunk
+
+# ── Constants ────────────────────────────────────────────────────────────────
+WIDTH, HEIGHT = 800, 700
+DROP_ZONE_HEIGHT = 80
+BUCKET_HEIGHT = 80
+PEG_AREA_TOP = DROP_ZONE_HEIGHT
+PEG_AREA_BOTTOM = HEIGHT - BUCKET_HEIGHT  # y=620
+DROP_Y = DROP_ZONE_HEIGHT // 2 + 10       # balls are released at y=50
+
+PEG_RADIUS = 8
+WALL_RADIUS = 2                           # walls and bucket dividers, the thinnest colliders
+PEG_CELL = 4 * PEG_RADIUS                 # spatial index cell, >= PEG_PICK_RADIUS
+PEG_PICK_RADIUS = 30                      # right-click reach when removing a peg
+BALL_RADIUS = 25
+BALL_MASS = 3
+NUM_BUCKETS = 7
+BUCKET_SCORES = [50, 100, 200, 500, 200, 100, 50]
+
+GRAVITY = (0, 900)
+DAMPING = 0.99
+FPS = 60
+SUBSTEPS = 3
+PHYSICS_HZ = FPS * SUBSTEPS               # fixed physics rate, independent of render FPS
+STEP_DT = 1.0 / PHYSICS_HZ                # one physics step
+
+MAX_DROP_TIME = 20.0                      # simulated seconds before giving up
+SETTLE_SPEED = 5.0                        # px/s (spin included); slower balls count as at rest
+SETTLE_TIME  = 0.5                        # seconds at rest before a ball is put to sleep
+SETTLE_CHECK = 0.1                        # seconds between settle checks
+
+# Adaptive substepping: each step is split so that no ball moves further than
+# SUBSTEP_TRAVEL·(r + WALL_RADIUS) per substep, at most max_substeps times
+SUBSTEP_TRAVEL = 0.5
+MAX_SUBSTEPS   = 8
+BALL_POOL_SIZE = 1000                     # balls in flight in multi-ball mode
+
+# Collision types
+BALL_TYPE   = 1
+BUCKET_TYPE = 2
+
+# Pooled balls share a filter group so they pass through each other
+POOL_FILTER = pymunk.ShapeFilter(group=1)
+
+
+# Sidebar setting ranges
+ELASTICITY_MIN, ELASTICITY_MAX, ELASTICITY_STEP = 0.1, 1.5, 0.05
+GRAVITY_MIN,    GRAVITY_MAX,    GRAVITY_STEP    = 100, 2000, 50
+DAMPING_MIN,    DAMPING_MAX,    DAMPING_STEP    = 0.80, 1.00, 0.01
+BALL_RADIUS_MIN, BALL_RADIUS_MAX, BALL_RADIUS_STEP = 5, 30, 1
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class PhysicsSettings:
+    """The sidebar settings, named after the PlinkoGame attributes they mirror."""
+    ball_elasticity:  float = 0.75
+    gravity_strength: float = GRAVITY[1]
+    damping_val:      float = DAMPING
+    ball_radius:      float = BALL_RADIUS
+
+
+def peg_in_area(px: float, py: float) -> bool:
+    """True if a peg centred at (px, py) lies strictly inside the peg area."""
+    return (PEG_AREA_TOP + PEG_RADIUS < py < PEG_AREA_BOTTOM - PEG_RADIUS
+            and PEG_RADIUS < px < WIDTH - PEG_RADIUS)
+
+
+def at_rest(body: pymunk.Body) -> bool:
+    """True if ``body`` is moving slower than SETTLE_SPEED, spin included."""
+    # kinetic_energy is m·v² + I·ω²
+    return body.kinetic_energy < body.mass * SETTLE_SPEED * SETTLE_SPEED
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+class PegIndex:
+    """Uniform grid over peg centres.
+
+    Cells are ``PEG_CELL`` wide, so any query within that distance only has to
+    look at the 3×3 block of cells around the query point.
+    """
+
+    def __init__(self, cell: float = PEG_CELL):
+        self.cell = cell
+        self._cells: dict[tuple[int, int], list[tuple[float, float, object]]] = {}
+
+    def _key(self, x: float, y: float) -> tuple[int, int]:
+        return int(x // self.cell), int(y // self.cell)
+
+    def insert(self, x: float, y: float, item: object):
+        self._cells.setdefault(self._key(x, y), []).append((x, y, item))
+
+    def remove(self, x: float, y: float, item: object):
+        key = self._key(x, y)
+        entries = self._cells[key]
+        for i, entry in enumerate(entries):
+            if entry[2] is item:
+                entries[i] = entries[-1]
+                entries.pop()
+                break
+        if not entries:
+            del self._cells[key]
+
+    def clear(self):
+        self._cells.clear()
+
+    def _neighbourhood(self, x: float, y: float):
+        cx, cy = self._key(x, y)
+        cells = self._cells
+        for gx in (cx - 1, cx, cx + 1):
+            for gy in (cy - 1, cy, cy + 1):
+                entries = cells.get((gx, gy))
+                if entries:
+                    yield from entries
+
+    def nearest(self, x: float, y: float, max_dist: float = PEG_CELL) -> object | None:
+        """The item closest to ``(x, y)`` within ``max_dist`` (at most one cell)."""
+        best, best_d2 = None, max_dist * max_dist
+        for ex, ey, item in self._neighbourhood(x, y):
+            d2 = (ex - x) ** 2 + (ey - y) ** 2
+            if d2 <= best_d2:
+                best, best_d2 = item, d2
+        return best
+
+    def any_within(self, x: float, y: float, dist: float) -> bool:
+        d2 = dist * dist
+        for ex, ey, _ in self._neighbourhood(x, y):
+            dx, dy = ex - x, ey - y
+            if dx * dx + dy * dy < d2:
+                return True
+        return False
+
+    def query_rect(self, x0: float, y0: float, x1: float, y1: float) -> list[object]:
+        """Items whose centres lie inside the rectangle (corners in any order)."""
+        x0, x1 = sorted((x0, x1))
+        y0, y1 = sorted((y0, y1))
+        (cx0, cy0), (cx1, cy1) = self._key(x0, y0), self._key(x1, y1)
+        found = []
+        for gx in range(cx0, cx1 + 1):
+            for gy in range(cy0, cy1 + 1):
+                for ex, ey, item in self._cells.get((gx, gy), ()):
+                    if x0 <= ex <= x1 and y0 <= ey <= y1:
+                        found.append(item)
+        return found
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+class PlinkoSimulator:
+    """The board's pymunk world, stepped at full CPU speed.
+
+    ``on_bucket_hit(ball_shape, bucket_index)`` is called the first time a
+    ball touches a bucket sensor; the index is also stored on the ball shape
+    as ``scored_bucket``.
+
+    Each :meth:`step` is split into as many substeps (up to ``max_substeps``)
+    as the fastest ball needs not to skip through a wall, divider or peg.
+    """
+
+    def __init__(self, pegs: Iterable[tuple[float, float]] = (),
+                 gravity: float = GRAVITY[1], damping: float = DAMPING,
+                 max_substeps: int = MAX_SUBSTEPS):
+        self.space = pymunk.Space()
+        self.space.gravity = (0, gravity)
+        self.space.damping = damping
+        # A ball at rest for SETTLE_TIME is put to sleep by _settle(): frozen in
+        # place and no longer integrated until something touches or wakes it.
+        # pymunk's own idle timer is only a slower backstop, since it is not
+        # kept when a space is pickled.
+        self.space.idle_speed_threshold = SETTLE_SPEED
+        self.space.sleep_time_threshold = 4 * SETTLE_TIME
+        self._next_settle = SETTLE_CHECK
+        # True while every ball is asleep (or there are none): step() then
+        # skips space.step. Recomputed by _settle(); cleared by anything that
+        # adds or wakes a ball.
+        self.asleep = True
+
+        self.pegs: list[pymunk.Circle] = []    # attached to space.static_body
+        self.peg_index = PegIndex()
+        self.time  = 0.0                    # simulated seconds stepped so far
+        self.steps = 0                      # fixed steps taken by step()
+        self.max_substeps  = max(1, max_substeps)   # a step is at least one space.step
+        self.substeps      = 1              # space.step calls in the last step()
+        self.tunnel_events = 0              # ball-steps fast enough to pass through a divider
+        self.min_ball_radius = BALL_RADIUS  # smallest ball added since the space was empty
+        self.on_bucket_hit: Callable[[pymunk.Shape, int], None] | None = None
+
+        self._setup_walls()
+        self._setup_buckets()
+        self._setup_collision_handlers()
+        self.add_pegs(pegs)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_sleeping"] = [b for b in self.space.bodies if b.is_sleeping]
+        return state
+
+    def __setstate__(self, state):
+        sleeping = state.pop("_sleeping", ())
+        self.__dict__.update(state)
+        for body in sleeping:           # pickled spaces come back fully awake
+            body.sleep()
+
+    @classmethod
+    def from_settings(cls, pegs: Iterable[tuple[float, float]],
+                      settings: PhysicsSettings) -> "PlinkoSimulator":
+        return cls(pegs, settings.gravity_strength, settings.damping_val)
+
+    # ── Space setup ───────────────────────────────────────────────────────────
+
+    def _setup_walls(self):
+        sb = self.space.static_body
+        walls = [
+            pymunk.Segment(sb, (0, 0), (0, HEIGHT), WALL_RADIUS),
+            pymunk.Segment(sb, (WIDTH, 0), (WIDTH, HEIGHT), WALL_RADIUS),
+            pymunk.Segment(sb, (0, HEIGHT), (WIDTH, HEIGHT), WALL_RADIUS),   # floor
+        ]
+        for w in walls:
+            w.elasticity = 0.6
+            w.friction   = 0.5
+        self.space.add(*walls)
+
+    def _setup_buckets(self):
+        sb = self.space.static_body
+        bucket_w = WIDTH / NUM_BUCKETS  # ~114.3 px each
+
+        # Vertical dividers — 6 lines between 7 buckets
+        self.divider_x: list[float] = []
+        for i in range(1, NUM_BUCKETS):
+            x = i * bucket_w
+            self.divider_x.append(x)
+            seg = pymunk.Segment(sb, (x, PEG_AREA_BOTTOM), (x, HEIGHT), WALL_RADIUS)
+            seg.elasticity = 0.5
+            seg.friction    = 0.8
+            self.space.add(seg)
+
+        # Invisible bucket sensors
+        self.bucket_sensors: list[pymunk.Shape] = []
+        for i in range(NUM_BUCKETS):
+            x_left  = i * bucket_w
+            x_right = (i + 1) * bucket_w
+            # sensor box: spans full bucket width, bottom 80 px; on the shared
+            # static body so that space.bodies holds only balls
+            shape = pymunk.Poly.create_box_bb(
+                sb,
+                pymunk.BB(x_left + 2, PEG_AREA_BOTTOM + 2, x_right - 2, HEIGHT),
+            )
+            shape.sensor         = True
+            shape.collision_type = BUCKET_TYPE
+            shape.bucket_index   = i          # custom attribute
+            self.space.add(shape)
+            self.bucket_sensors.append(shape)
+
+    def _setup_collision_handlers(self):
+        # a bound method rather than a closure, so the space can be pickled
+        self.space.on_collision(BALL_TYPE, BUCKET_TYPE, begin=self._begin_bucket)
+
+    def _begin_bucket(self, arbiter, space, data):
+        ball, sensor = arbiter.shapes
+        if getattr(ball, "scored_bucket", None) is None:   # record only first hit
+            ball.scored_bucket = sensor.bucket_index
+            if self.on_bucket_hit is not None:
+                self.on_bucket_hit(ball, sensor.bucket_index)
+
+    # ── Settings ──────────────────────────────────────────────────────────────
+
+    def set_gravity(self, gravity: float):
+        self.space.gravity = (0, gravity)
+        self.wake()
+
+    def set_damping(self, damping: float):
+        self.space.damping = damping
+        self.wake()
+
+    # ── Peg management ────────────────────────────────────────────────────────
+
+    def _peg_fits(self, px: float, py: float) -> bool:
+        if not peg_in_area(px, py):
+            return False
+        return not self.peg_index.any_within(px, py, 2 * PEG_RADIUS)
+
+    def _make_peg(self, px: float, py: float) -> pymunk.Circle:
+        shape = pymunk.Circle(self.space.static_body, PEG_RADIUS, (px, py))
+        shape.elasticity = 0.8
+        shape.friction    = 0.5
+        shape.peg_slot    = len(self.pegs)    # custom attribute: index in self.pegs
+        self.pegs.append(shape)
+        self.peg_index.insert(px, py, shape)
+        return shape
+
+    def add_peg(self, pos: tuple[float, float]) -> bool:
+        """Place a peg at ``pos``.
+
+        Returns False if it is outside the peg area or would overlap an
+        existing peg.
+        """
+        px, py = pos
+        if not self._peg_fits(px, py):
+            return False
+        self.space.add(self._make_peg(px, py))
+        self.wake()
+        return True
+
+    def add_pegs(self, positions: Iterable[tuple[float, float]]) -> int:
+        """Place many pegs with a single ``space.add``; returns how many fit.
+
+        ``positions`` may be any iterable of pairs, including an (N, 2) NumPy
+        array. Pegs that fail the :meth:`add_peg` checks are skipped.
+        """
+        if hasattr(positions, "tolist"):
+            positions = positions.tolist()
+        shapes = [self._make_peg(px, py) for px, py in positions if self._peg_fits(px, py)]
+        if shapes:
+            self.space.add(*shapes)
+            self.space.reindex_static()
+            self.wake()
+        return len(shapes)
+
+    def remove_peg(self, shape: pymunk.Shape):
+        # swap-remove from the peg list, keeping slots in step
+        last = self.pegs.pop()
+        if last is not shape:
+            self.pegs[shape.peg_slot] = last
+            last.peg_slot = shape.peg_slot
+        self.peg_index.remove(shape.offset.x, shape.offset.y, shape)
+        self.space.remove(shape)
+        self.wake()
+
+    def nearest_peg(self, pos: tuple[float, float],
+                    max_dist: float = PEG_PICK_RADIUS) -> pymunk.Shape | None:
+        return self.peg_index.nearest(pos[0], pos[1], max_dist)
+
+    def pegs_in_rect(self, x0: float, y0: float, x1: float, y1: float) -> list[pymunk.Shape]:
+        return self.peg_index.query_rect(x0, y0, x1, y1)
+
+    def clear_pegs(self):
+        if self.pegs:
+            self.space.remove(*self.pegs)
+        self.pegs.clear()
+        self.peg_index.clear()
+        self.wake()
+
+    def peg_positions(self) -> list[tuple[float, float]]:
+        return [tuple(shape.offset) for shape in self.pegs]
+
+    # ── Balls ─────────────────────────────────────────────────────────────────
+
+    def add_ball(self, x: float, elasticity: float = 0.75,
+                 radius: float = BALL_RADIUS) -> tuple[pymunk.Body, pymunk.Shape]:
+        """Release a ball at ``(x, DROP_Y)`` and return its body and shape."""
+        self.track_radius(radius)
+        moment = pymunk.moment_for_circle(BALL_MASS, 0, radius)
+        body   = pymunk.Body(BALL_MASS, moment)
+        body.position = (x, DROP_Y)
+        body.settle_time = 0.0
+        shape = pymunk.Circle(body, radius)
+        shape.elasticity     = elasticity
+        shape.friction        = 0.4
+        shape.collision_type  = BALL_TYPE
+        shape.scored_bucket   = None
+        self.space.add(body, shape)
+        self.asleep = False
+        return body, shape
+
+    def remove_ball(self, body: pymunk.Body, shape: pymunk.Shape):
+        self.space.remove(body, shape)
+
+    def track_radius(self, radius: float):
+        """Note the radius of a ball about to be added, for substepping."""
+        if not self.space.bodies:
+            self.min_ball_radius = radius
+        else:
+            self.min_ball_radius = min(self.min_ball_radius, radius)
+
+    # ── Stepping ──────────────────────────────────────────────────────────────
+
+    def wake(self):
+        """Wake every sleeping ball; call when gravity, damping or the pegs change."""
+        for body in self.space.bodies:
+            if body.is_sleeping:
+                body.activate()
+            body.settle_time = 0.0      # a full SETTLE_TIME at rest before it sleeps again
+        self.asleep = False             # until the next _settle() says otherwise
+
+    def step(self, dt: float = STEP_DT):
+        """Advance the world by one fixed step of ``dt`` seconds.
+
+        ``space.step`` is skipped while :attr:`asleep`; the clock still advances.
+        """
+        if not self.asleep:
+            # kinetic_energy is m·v² + I·ω², an upper bound on m·v²
+            energies = [body.kinetic_energy for body in self.space.bodies]
+            top = max(energies, default=0.0)
+            n = self.substeps = self.substeps_for(top, dt)
+            # a ball moving over 2·(r + WALL_RADIUS) per substep can pass
+            # through a divider without ever overlapping it
+            limit = self._tunnel_energy(dt / n)
+            if top > limit:
+                self.tunnel_events += sum(e > limit for e in energies)
+            h = dt / n
+            for _ in range(n):
+                self.space.step(h)
+        self.steps += 1
+        self.time  += dt
+        if self.time >= self._next_settle:
+            self._next_settle += SETTLE_CHECK
+            self._settle()
+
+    def substeps_for(self, energy: float, dt: float) -> int:
+        """Substeps needed in a step of ``dt`` by a ball with kinetic ``energy``."""
+        speed = math.sqrt(energy / BALL_MASS)
+        travel = SUBSTEP_TRAVEL * (self.min_ball_radius + WALL_RADIUS)
+        return min(max(1, math.ceil(speed * dt / travel)), self.max_substeps)
+
+    def _tunnel_energy(self, h: float) -> float:
+        speed = 2 * (self.min_ball_radius + WALL_RADIUS) / h
+        return BALL_MASS * speed * speed
+
+    def _settle(self):
+        """Sleep balls that were at rest at every check for SETTLE_TIME."""
+        asleep = True
+        for body in self.space.bodies:        # only balls; all static shapes share static_body
+            if body.is_sleeping:
+                continue
+            if not at_rest(body):
+                body.settle_time = 0.0
+                asleep = False
+                continue
+            body.settle_time += SETTLE_CHECK
+            if body.settle_time >= SETTLE_TIME:
+                body.settle_time = 0.0      # counts afresh once something wakes it
+                body.sleep()
+            else:
+                asleep = False
+        self.asleep = asleep
+
+    def simulate_drop(self, x: float, elasticity: float = 0.75,
+                      radius: float = BALL_RADIUS,
+                      max_time: float = MAX_DROP_TIME,
+                      dt: float = STEP_DT) -> int | None:
+        """Drop one ball at ``x`` and return the index of the bucket it lands in.
+
+        Stepping stops as soon as the ball touches a bucket sensor, so a drop
+        costs only as many substeps as the ball needs to reach the bucket
+        strip. Returns None if the ball leaves the board, falls asleep on the
+        pegs (stuck) or is still bouncing after ``max_time`` simulated seconds.
+        """
+        body, shape = self.add_ball(x, elasticity, radius)
+        step = self.space.step
+        check = max(1, round(SETTLE_CHECK / dt))
+        try:
+            for i in range(1, int(max_time / dt) + 1):
+                n = self.substeps_for(body.kinetic_energy, dt)
+                for _ in range(n):
+                    step(dt / n)
+                if shape.scored_bucket is not None:
+                    break
+                if body.position.y > HEIGHT + 50:
+                    break
+                if i % check == 0:              # the same rest test as _settle()
+                    body.settle_time = body.settle_time + SETTLE_CHECK if at_rest(body) else 0.0
+                    if body.settle_time >= SETTLE_TIME:
+                        break
+        finally:
+            self.remove_ball(body, shape)
+        return shape.scored_bucket
+
+    def simulate_many(self, xs: Iterable[float], elasticity: float = 0.75,
+                      radius: float = BALL_RADIUS,
+                      max_time: float = MAX_DROP_TIME) -> list[int | None]:
+        """Run :meth:`simulate_drop` for every x in ``xs``, one ball at a time."""
+        return [self.simulate_drop(x, elasticity, radius, max_time) for x in xs]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+class BallPool:
+    """A fixed set of pre-allocated balls that can be in flight together.
+
+    Per-ball scoring state lives in flat arrays indexed by slot rather than on
+    per-ball objects. A ball that lands in a bucket, leaves the board, runs out
+    of time or falls asleep on the pegs is taken out of the space after the
+    step, and its slot goes back on the free list; the same body and shape are
+    reused by the next :meth:`spawn`. Pooled balls do not collide with each
+    other.
+    """
+
+    def __init__(self, sim: PlinkoSimulator, capacity: int = BALL_POOL_SIZE):
+        self.sim = sim
+        self.capacity = capacity
+        self.bodies: list[pymunk.Body] = []
+        self.shapes: list[pymunk.Circle] = []
+        for slot in range(capacity):
+            body  = pymunk.Body(BALL_MASS, pymunk.moment_for_circle(BALL_MASS, 0, BALL_RADIUS))
+            shape = pymunk.Circle(body, BALL_RADIUS)
+            shape.friction       = 0.4
+            shape.collision_type = BALL_TYPE
+            shape.filter         = POOL_FILTER
+            shape.scored_bucket  = None
+            shape.slot           = slot       # custom attribute
+            body.settle_time     = 0.0
+            self.bodies.append(body)
+            self.shapes.append(shape)
+
+        self.active     = bytearray(capacity)             # 1 while in the space
+        self.scored     = array("b", [-1]) * capacity     # bucket index, -1 = none
+        self.spawned_at = array("d", [0.0]) * capacity    # sim.time at spawn
+        self.prev_x     = array("d", [0.0]) * capacity    # position at snapshot(),
+        self.prev_y     = array("d", [0.0]) * capacity    # for render interpolation
+        self.free: list[int] = list(range(capacity - 1, -1, -1))
+        self.live: set[int] = set()
+        self._finished: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self.live)
+
+    def spawn(self, x: float, elasticity: float = 0.75,
+              radius: float = BALL_RADIUS) -> int | None:
+        """Release a pooled ball at ``(x, DROP_Y)``; returns its slot, or None if full."""
+        if not self.free:
+            return None
+        slot  = self.free.pop()
+        body  = self.bodies[slot]
+        shape = self.shapes[slot]
+        self.sim.track_radius(radius)
+        if shape.radius != radius:
+            shape.unsafe_set_radius(radius)
+            body.moment = pymunk.moment_for_circle(BALL_MASS, 0, radius)
+        shape.elasticity    = elasticity
+        shape.scored_bucket = None
+        body.position         = (x, DROP_Y)
+        body.velocity         = (0, 0)
+        body.angle            = 0
+        body.angular_velocity = 0
+        body.settle_time      = 0.0
+        self.sim.space.add(body, shape)
+        self.sim.asleep       = False
+        self.active[slot]     = 1
+        self.scored[slot]     = -1
+        self.spawned_at[slot] = self.sim.time
+        self.prev_x[slot]     = x
+        self.prev_y[slot]     = DROP_Y
+        self.live.add(slot)
+        return slot
+
+    def snapshot(self):
+        """Remember every live ball's position before the last step of a frame."""
+        bodies, prev_x, prev_y = self.bodies, self.prev_x, self.prev_y
+        for slot in self.live:
+            prev_x[slot], prev_y[slot] = bodies[slot].position
+
+    def on_bucket_hit(self, shape: pymunk.Shape, bucket_index: int):
+        """Record a landing; the ball is recycled by the next :meth:`collect`."""
+        self.scored[shape.slot] = bucket_index
+        self._finished.append(shape.slot)
+
+    def collect(self, max_time: float = MAX_DROP_TIME) -> list[tuple[int, int]]:
+        """Recycle finished balls; call after stepping, never from a callback.
+
+        Returns ``(slot, bucket)`` for each recycled ball, with bucket -1 for
+        balls that left the board, got stuck or timed out.
+        """
+        deadline = self.sim.time - max_time
+        # in slot order: a set's iteration order depends on its history, which
+        # a pickled session does not keep, and release order decides reuse order
+        for slot in sorted(self.live):
+            if self.scored[slot] >= 0:
+                continue                      # landed, already queued
+            body = self.bodies[slot]
+            if (body.position.y > HEIGHT + 50 or body.is_sleeping
+                    or self.spawned_at[slot] < deadline):
+                self._finished.append(slot)
+
+        done = [(slot, self.scored[slot]) for slot in self._finished]
+        for slot, _ in done:
+            self.release(slot)
+        self._finished.clear()
+        return done
+
+    def release(self, slot: int):
+        if not self.active[slot]:
+            return
+        self.sim.space.remove(self.bodies[slot], self.shapes[slot])
+        self.active[slot] = 0
+        self.live.discard(slot)
+        self.free.append(slot)
+
+    def clear(self):
+        for slot in sorted(self.live):
+            self.release(slot)
+        self._finished.clear()
@@ -0,0 +1,137 @@
+"""Streaming outcome statistics for a session.
+
+Every finished drop updates a handful of fixed-size arrays in O(1), so the
+statistics cost the same after a million drops as after ten and memory never
+grows:
+
+* all-time hits per bucket and misses;
+* running mean and variance of the per-drop score, a miss scoring 0 as in
+  montecarlo.py and the server (Welford's algorithm);
+* hits per bucket over the last ``window`` drops, from a ring of bucket
+  indices and counts that are decremented as drops fall out of it;
+* drops per second over the last ``rate_window`` drops, from a ring of
+  (simulated) finish times.
+
+    stats = SessionStats()
+    stats.record(3, sim.time)        # landed in bucket 3
+    stats.record(-1, sim.time)       # fell out or got stuck
+    stats.summary()["score_mean"]
+"""
+import csv
+import json
+import math
+from array import array
+
+from simulator import NUM_BUCKETS, BUCKET_SCORES
+
+STATS_WINDOW       = 500           # recent drops the windowed hit rates cover
+RATE_WINDOW        = 64            # recent drops the drop rate is measured over
+DEFAULT_STATS_PATH = "stats.json"  # where the game's E key exports them
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+class SessionStats:
+    """Outcome statistics over every drop recorded since the last :meth:`clear`."""
+
+    def __init__(self, window: int = STATS_WINDOW, rate_window: int = RATE_WINDOW):
+        self.window      = window
+        self.rate_window = rate_window
+        self.hits        = array("l", [0]) * NUM_BUCKETS   # landings per bucket, all time
+        self.recent_hits = array("l", [0]) * NUM_BUCKETS   # landings per bucket, last window
+        self._recent     = array("b", [-1]) * window       # ring of buckets, -1 = miss
+        self._times      = array("d", [0.0]) * rate_window # ring of finish times
+        self.clear()
+
+    def clear(self):
+        for i in range(NUM_BUCKETS):
+            self.hits[i] = self.recent_hits[i] = 0
+        self.drops  = 0           # finished drops, landed or not
+        self.misses = 0
+        self.landed = 0
+        self.mean   = 0.0         # running score mean per drop, misses scoring 0
+        self._m2    = 0.0         # sum of squared deviations from the mean
+
+    def record(self, bucket: int, t: float):
+        """One finished drop at time ``t``: its bucket index, or -1 for a miss."""
+        if bucket >= 0:
+            self.hits[bucket] += 1
+            self.landed += 1
+            score = BUCKET_SCORES[bucket]
+        else:
+            self.misses += 1
+            score = 0
+        delta = score - self.mean
+        self.mean += delta / (self.drops + 1)
+        self._m2  += delta * (score - self.mean)
+
+        i = self.drops % self.window
+        if self.drops >= self.window:
+            old = self._recent[i]
+            if old >= 0:
+                self.recent_hits[old] -= 1
+        self._recent[i] = bucket
+        if bucket >= 0:
+            self.recent_hits[bucket] += 1
+        self._times[self.drops % self.rate_window] = t
+        self.drops += 1
+
+    # ── Derived values ────────────────────────────────────────────────────────
+
+    @property
+    def variance(self) -> float:
+        """Sample variance of the per-drop score."""
+        return self._m2 / (self.drops - 1) if self.drops > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def shares(self) -> list[float]:
+        """Fraction of all landings in each bucket."""
+        return [h / self.landed if self.landed else 0.0 for h in self.hits]
+
+    def recent_shares(self) -> list[float]:
+        """Fraction of the landings among the last ``window`` drops in each bucket."""
+        total = sum(self.recent_hits)
+        return [h / total if total else 0.0 for h in self.recent_hits]
+
+    def drops_per_second(self, now: float) -> float:
+        """Rate over the last ``rate_window`` drops, as seen at time ``now``."""
+        n = min(self.drops, self.rate_window)
+        if n == 0:
+            return 0.0
+        oldest = self._times[(self.drops - n) % self.rate_window]
+        return n / (now - oldest) if now > oldest else 0.0
+
+    def summary(self, now: float | None = None) -> dict:
+        doc = {
+            "drops":       self.drops,
+            "landed":      self.landed,
+            "misses":      self.misses,
+            "score_mean":  self.mean,
+            "score_std":   self.std,
+            "hits":        list(self.hits),
+            "recent_hits": list(self.recent_hits),
+            "window":      self.window,
+        }
+        if now is not None:
+            doc["drops_per_second"] = self.drops_per_second(now)
+        return doc
+
+    # ── Export ────────────────────────────────────────────────────────────────
+
+    def export(self, path: str, now: float | None = None, extra: dict | None = None):
+        """Write the statistics to ``path``: per-bucket CSV if it ends in .csv,
+        JSON (summary plus any ``extra`` fields) otherwise."""
+        if path.lower().endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["bucket", "score", "hits", "share", "recent_hits", "recent_share"])
+                for i, (share, recent) in enumerate(zip(self.shares(), self.recent_shares())):
+                    writer.writerow([i, BUCKET_SCORES[i], self.hits[i], share,
+                                     self.recent_hits[i], recent])
+            return
+        doc = dict(extra or {})
+        doc.update(self.summary(now))
+        with open(path, "w") as f:
+            json.dump(doc, f, indent=2)
@@ -0,0 +1,409 @@
+"""Sweep the physics settings and map how a board's outcome responds.
+
+Each point of the sweep is a full set of sidebar settings. Points come either
+from the sidebar's own grid (every ``*_STEP`` between ``*_MIN`` and ``*_MAX``,
+or ``--points`` evenly spaced values of it) or from a Latin-hypercube sample
+of the same ranges. Every point drops the same balls (common random numbers,
+as in optimise.py), so neighbouring points differ only by their settings.
+
+Points are run in chunks on a pool of worker processes. Each finished chunk
+is written to ``OUT/chunks/`` straight away, and a rerun of the same command
+skips the chunks already on disk, so an interrupted sweep resumes where it
+stopped. When every chunk is done the sweep writes:
+
+* ``sweep.npz``: setting names, per-point settings, bucket counts (misses in
+  the last column), expected score and miss rate;
+* ``sweep.csv``: the same, one row per point;
+* PNG heatmaps: the expected score and miss rate for every pair of swept
+  settings (averaged over the others), and the bucket distribution against
+  each swept setting. pygame draws them offscreen and is imported only then.
+
+    python sweep.py --layout board.npy --vary gravity elasticity -o gravity-sweep
+    python sweep.py --layout board.npy --vary gravity damping radius --points 8 -n 500
+    python sweep.py --layout board.npy --vary elasticity gravity damping radius --lhs 400 -o lhs
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import astuple, dataclass, replace
+from itertools import combinations
+
+import numpy as np
+
+from layouts import load_layout
+from montecarlo import drop_counts, shard_rng
+from session import SETTING_RANGES
+from simulator import (
+    NUM_BUCKETS, BUCKET_SCORES, PhysicsSettings, PlinkoSimulator,
+    ELASTICITY_STEP, GRAVITY_STEP, DAMPING_STEP, BALL_RADIUS_STEP,
+)
+
+# command-line name -> PhysicsSettings field
+PARAMS = {
+    "elasticity": "ball_elasticity",
+    "gravity":    "gravity_strength",
+    "damping":    "damping_val",
+    "radius":     "ball_radius",
+}
+SETTING_STEPS = {
+    "ball_elasticity":  ELASTICITY_STEP,
+    "gravity_strength": GRAVITY_STEP,
+    "damping_val":      DAMPING_STEP,
+    "ball_radius":      BALL_RADIUS_STEP,
+}
+
+DROPS       = 1000    # drops per point
+CHUNK       = 8       # points per worker task and per file on disk
+LHS_BINS    = 16      # most heatmap cells per axis for Latin-hypercube samples
+CELL_SIZE   = 28      # px per heatmap cell, before shrinking to fit
+PLOT_SIZE   = 560     # px, largest heatmap plot area
+HEATMAP_BG  = (26, 26, 46)
+HEATMAP_FG  = (200, 200, 230)
+EMPTY_CELL  = (55, 55, 75)
+# perceptually ordered colour ramp, low to high (viridis anchors)
+COLOUR_RAMP = [(68, 1, 84), (59, 82, 139), (33, 145, 140), (94, 201, 98), (253, 231, 37)]
+
+
+# ── Sample plans ─────────────────────────────────────────────────────────────
+
+def grid_values(attr: str, points: int | None = None) -> np.ndarray:
+    """The sidebar's values for ``attr``, or ``points`` evenly spaced ones of them."""
+    lo, hi = SETTING_RANGES[attr]
+    step = SETTING_STEPS[attr]
+    values = np.round(lo + step * np.arange(round((hi - lo) / step) + 1), 6)
+    if points is not None and points < len(values):
+        values = values[np.unique(np.round(np.linspace(0, len(values) - 1, points)).astype(int))]
+    return values
+
+
+def grid_plan(attrs: list[str], points: int | None = None) -> np.ndarray:
+    """Cartesian product of the swept settings' grids, one row per point."""
+    axes = np.meshgrid(*(grid_values(a, points) for a in attrs), indexing="ij")
+    return np.stack([a.ravel() for a in axes], axis=1)
+
+
+def lhs_plan(attrs: list[str], n: int, seed: int = 0) -> np.ndarray:
+    """``n`` Latin-hypercube samples: each setting's range is cut into ``n``
+    strata and every stratum is used exactly once."""
+    rng = np.random.default_rng(seed)
+    plan = np.empty((n, len(attrs)))
+    for j, attr in enumerate(attrs):
+        lo, hi = SETTING_RANGES[attr]
+        u = (rng.permutation(n) + rng.random(n)) / n
+        plan[:, j] = lo + u * (hi - lo)
+    return plan
+
+
+def point_settings(attrs: list[str], row, base: PhysicsSettings) -> PhysicsSettings:
+    return replace(base, **{a: float(v) for a, v in zip(attrs, row)})
+
+
+# ── Worker side ──────────────────────────────────────────────────────────────
+
+_worker_sim: PlinkoSimulator | None = None
+
+
+def _init_worker(pegs: list[tuple[float, float]]):
+    """Build the space once per process; gravity and damping are set per point."""
+    global _worker_sim
+    _worker_sim = PlinkoSimulator(pegs)
+
+
+def _run_points(points: list[PhysicsSettings], drops: int, seed: int) -> list[list[int]]:
+    sim = _worker_sim
+    rows = []
+    for settings in points:
+        sim.set_gravity(settings.gravity_strength)
+        sim.set_damping(settings.damping_val)
+        rows.append(drop_counts(sim, settings, shard_rng(seed, 0), drops))
+    return rows
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+@dataclass
+class SweepResult:
+    """Outcome of every point of a sweep. Misses score 0."""
+    names:  list[str]           # swept PhysicsSettings fields
+    params: np.ndarray          # (points, len(names)) swept values
+    counts: np.ndarray          # (points, NUM_BUCKETS + 1) hits per bucket, misses last
+    drops:  int                 # drops per point
+    grid:   bool                # params form a Cartesian grid
+
+    @property
+    def probabilities(self) -> np.ndarray:
+        return self.counts[:, :NUM_BUCKETS] / self.drops
+
+    @property
+    def expected_score(self) -> np.ndarray:
+        return self.probabilities @ np.asarray(BUCKET_SCORES, dtype=np.float64)
+
+    @property
+    def miss_rate(self) -> np.ndarray:
+        return self.counts[:, NUM_BUCKETS] / self.drops
+
+    def save_npz(self, path: str):
+        np.savez(path, names=np.array(self.names), params=self.params, counts=self.counts,
+                 drops=self.drops, expected_score=self.expected_score, miss_rate=self.miss_rate)
+
+    def save_csv(self, path: str):
+        header = self.names + ["expected_score", "miss_rate"] + [f"p{i}" for i in range(NUM_BUCKETS)]
+        table = np.column_stack([self.params, self.expected_score, self.miss_rate, self.probabilities])
+        np.savetxt(path, table, delimiter=",", header=",".join(header), comments="", fmt="%.6g")
+
+
+def _layout_digest(pegs: list[tuple[float, float]]) -> str:
+    return hashlib.sha1(np.asarray(pegs, dtype=np.float64).tobytes()).hexdigest()
+
+
+def _open_output(out_dir: str, plan_doc: dict) -> str:
+    """Create ``out_dir`` for this plan, or check an existing one is for the same plan."""
+    chunk_dir = os.path.join(out_dir, "chunks")
+    os.makedirs(chunk_dir, exist_ok=True)
+    plan_path = os.path.join(out_dir, "plan.json")
+    if os.path.exists(plan_path):
+        with open(plan_path) as f:
+            if json.load(f) != plan_doc:
+                raise SystemExit(f"{out_dir} holds a different sweep; "
+                                 f"pick another --out or delete it to start over")
+    else:
+        with open(plan_path, "w") as f:
+            json.dump(plan_doc, f, indent=2)
+    return chunk_dir
+
+
+def run_sweep(pegs, attrs: list[str], plan: np.ndarray,
+              base: PhysicsSettings = PhysicsSettings(), drops: int = DROPS,
+              workers: int | None = None, seed: int = 0, out_dir: str | None = None,
+              chunk_size: int = CHUNK, grid: bool = True,
+              progress: bool = False) -> SweepResult:
+    """Run ``drops`` drops at every row of ``plan`` (values of ``attrs``;
+    other settings from ``base``).
+
+    With ``out_dir`` each chunk of points is saved as it finishes and chunks
+    already there are reused, so the same call resumes an interrupted sweep.
+    """
+    pegs = [(float(x), float(y)) for x, y in pegs]
+    workers = workers or os.cpu_count() or 1
+    points = [point_settings(attrs, row, base) for row in plan]
+    chunks = [points[i:i + chunk_size] for i in range(0, len(points), chunk_size)]
+    counts = np.zeros((len(points), NUM_BUCKETS + 1), dtype=np.int64)
+
+    chunk_dir = None
+    todo = list(range(len(chunks)))
+    if out_dir is not None:
+        chunk_dir = _open_output(out_dir, {
+            "layout": _layout_digest(pegs), "names": attrs, "plan": plan.tolist(),
+            "base": list(astuple(base)), "drops": drops, "seed": seed, "chunk_size": chunk_size,
+        })
+        todo = []
+        for i in range(len(chunks)):
+            path = os.path.join(chunk_dir, f"{i:05d}.npy")
+            if os.path.exists(path):
+                counts[i * chunk_size:i * chunk_size + len(chunks[i])] = np.load(path)
+            else:
+                todo.append(i)
+
+    done = len(chunks) - len(todo)
+
+    def finish(i: int, rows: list[list[int]]):
+        nonlocal done
+        counts[i * chunk_size:i * chunk_size + len(rows)] = rows
+        if chunk_dir is not None:
+            path = os.path.join(chunk_dir, f"{i:05d}.npy")
+            with open(path + ".tmp", "wb") as f:     # np.save would append .npy
+                np.save(f, np.asarray(rows, dtype=np.int64))
+            os.replace(path + ".tmp", path)          # never leave half a chunk behind
+        done += 1
+        if progress:
+            print(f"\r{done}/{len(chunks)} chunks", end="", file=sys.stderr, flush=True)
+
+    if workers == 1 or len(todo) <= 1:
+        _init_worker(pegs)
+        for i in todo:
+            finish(i, _run_points(chunks[i], drops, seed))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(pegs,)) as pool:
+            futures = {pool.submit(_run_points, chunks[i], drops, seed): i for i in todo}
+            try:
+                for future in as_completed(futures):
+                    finish(futures[future], future.result())
+            except KeyboardInterrupt:
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+    if progress:
+        print(file=sys.stderr)
+    return SweepResult(list(attrs), plan, counts, drops, grid)
+
+
+# ── Heatmaps ─────────────────────────────────────────────────────────────────
+
+def _axis_bins(values: np.ndarray, attr: str, grid: bool) -> tuple[np.ndarray, np.ndarray]:
+    """Cell index of each value along one axis, and the cell centres."""
+    if grid:
+        centres, index = np.unique(values, return_inverse=True)
+        return index, centres
+    lo, hi = SETTING_RANGES[attr]
+    n = max(2, min(LHS_BINS, int(math.sqrt(len(values)))))
+    edges = np.linspace(lo, hi, n + 1)
+    index = np.clip(np.searchsorted(edges, values, side="right") - 1, 0, n - 1)
+    return index, (edges[:-1] + edges[1:]) / 2
+
+
+def _cell_means(ix, iy, nx: int, ny: int, values: np.ndarray) -> np.ndarray:
+    """Mean of ``values`` per (x, y) cell; NaN where no point fell."""
+    total = np.zeros((nx, ny))
+    count = np.zeros((nx, ny))
+    np.add.at(total, (ix, iy), values)
+    np.add.at(count, (ix, iy), 1)
+    with np.errstate(invalid="ignore"):
+        return total / count
+
+
+def _ramp(t: float) -> tuple[int, int, int]:
+    t = min(max(t, 0.0), 1.0) * (len(COLOUR_RAMP) - 1)
+    i = min(int(t), len(COLOUR_RAMP) - 2)
+    f = t - i
+    a, b = COLOUR_RAMP[i], COLOUR_RAMP[i + 1]
+    return tuple(round(a[k] + (b[k] - a[k]) * f) for k in range(3))
+
+
+def _short(attr: str) -> str:
+    return next(k for k, v in PARAMS.items() if v == attr)
+
+
+def _draw_heatmap(pygame, font, path: str, title: str, cells: np.ndarray,
+                  x_label: str, x_ticks, y_label: str, y_ticks):
+    """Save ``cells`` (indexed [x, y], y up) as a labelled PNG with a colour bar."""
+    nx, ny = cells.shape
+    cell = max(2, min(CELL_SIZE, PLOT_SIZE // max(nx, ny)))
+    left, top, bottom, right = 70, 36, 50, 90
+    width  = max(left + nx * cell + right, left + font.size(title)[0] + 10)
+    height = top + ny * cell + bottom
+    surface = pygame.Surface((width, height))
+    surface.fill(HEATMAP_BG)
+
+    finite = cells[np.isfinite(cells)]
+    lo, hi = (finite.min(), finite.max()) if finite.size else (0.0, 1.0)
+    span = hi - lo or 1.0
+    for x in range(nx):
+        for y in range(ny):
+            v = cells[x, y]
+            colour = EMPTY_CELL if not np.isfinite(v) else _ramp((v - lo) / span)
+            surface.fill(colour, (left + x * cell, top + (ny - 1 - y) * cell, cell, cell))
+
+    def text(s: str, pos, anchor: str = "topleft"):
+        surf = font.render(s, True, HEATMAP_FG)
+        surface.blit(surf, surf.get_rect(**{anchor: pos}))
+
+    text(title, (left, 10))
+    plot_bottom = top + ny * cell
+    for x in sorted({0, nx // 2, nx - 1}):
+        text(f"{x_ticks[x]:.4g}", (left + x * cell + cell // 2, plot_bottom + 4), "midtop")
+    text(x_label, (left + nx * cell // 2, plot_bottom + 24), "midtop")
+    for y in sorted({0, ny // 2, ny - 1}):
+        text(f"{y_ticks[y]:.4g}", (left - 6, top + (ny - 1 - y) * cell + cell // 2), "midright")
+    text(y_label, (6, top - 18))
+
+    bar_x, bar_h = left + nx * cell + 16, ny * cell
+    for row in range(bar_h):
+        surface.fill(_ramp(1 - row / max(bar_h - 1, 1)), (bar_x, top + row, 14, 1))
+    text(f"{hi:.3g}", (bar_x + 18, top), "topleft")
+    text(f"{lo:.3g}", (bar_x + 18, top + bar_h), "bottomleft")
+    pygame.image.save(surface, path)
+
+
+def save_heatmaps(result: SweepResult, out_dir: str) -> list[str]:
+    """Draw the sweep's heatmaps offscreen into ``out_dir``; returns the files written."""
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    import pygame
+    from renderer import load_fonts
+    pygame.font.init()
+    font = load_fonts({"label": (13, False)})["label"]
+
+    bins = [_axis_bins(result.params[:, j], a, result.grid) for j, a in enumerate(result.names)]
+    score, miss = result.expected_score, result.miss_rate
+    written = []
+    for (i, a), (j, b) in combinations(enumerate(result.names), 2):
+        (ix, xs), (iy, ys) = bins[i], bins[j]
+        rest = [_short(n) for n in result.names if n not in (a, b)]
+        note = f" (mean over {', '.join(rest)})" if rest else ""
+        for kind, values in (("score", score), ("miss", miss)):
+            path = os.path.join(out_dir, f"{kind}_{_short(a)}_{_short(b)}.png")
+            label = "expected score" if kind == "score" else "miss rate"
+            _draw_heatmap(pygame, font, path, f"{label}{note}",
+                          _cell_means(ix, iy, len(xs), len(ys), values),
+                          _short(a), xs, _short(b), ys)
+            written.append(path)
+
+    probs = result.probabilities
+    for i, a in enumerate(result.names):
+        ix, xs = bins[i]
+        cells = np.stack([_cell_means(ix, np.zeros_like(ix), len(xs), 1, probs[:, k])[:, 0]
+                          for k in range(NUM_BUCKETS)], axis=1)
+        path = os.path.join(out_dir, f"buckets_{_short(a)}.png")
+        _draw_heatmap(pygame, font, path, "share of drops per bucket",
+                      cells, _short(a), xs, "bucket", range(NUM_BUCKETS))
+        written.append(path)
+    pygame.quit()
+    return written
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+def main(argv: list[str] | None = None):
+    defaults = PhysicsSettings()
+    parser = argparse.ArgumentParser(description="Sweep the physics settings of a Plinko board")
+    parser.add_argument("--layout", metavar="FILE", help="peg layout (.npy); default is an empty board")
+    parser.add_argument("--vary", nargs="+", choices=list(PARAMS), default=["elasticity", "gravity"],
+                        help="settings to sweep (default elasticity gravity)")
+    parser.add_argument("--points", type=int, metavar="N",
+                        help="values per swept setting on the grid (default every sidebar step)")
+    parser.add_argument("--lhs", type=int, metavar="N",
+                        help="take N Latin-hypercube samples instead of a grid")
+    parser.add_argument("-n", "--drops", type=int, default=DROPS, help="drops per point")
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--out", metavar="DIR", default="sweep",
+                        help="output directory; rerunning into it resumes the sweep")
+    parser.add_argument("--no-heatmaps", action="store_true", help="skip the PNG heatmaps")
+    parser.add_argument("--elasticity", type=float, default=defaults.ball_elasticity)
+    parser.add_argument("--gravity", type=float, default=defaults.gravity_strength)
+    parser.add_argument("--damping", type=float, default=defaults.damping_val)
+    parser.add_argument("--radius", type=float, default=defaults.ball_radius)
+    args = parser.parse_args(argv)
+    for flag, value in (("--drops", args.drops), ("--points", args.points), ("--lhs", args.lhs)):
+        if value is not None and value < 1:
+            parser.error(f"{flag} must be at least 1")
+
+    attrs = [PARAMS[p] for p in dict.fromkeys(args.vary)]
+    if args.lhs is not None:
+        plan = lhs_plan(attrs, args.lhs, args.seed)
+    else:
+        plan = grid_plan(attrs, args.points)
+    base = PhysicsSettings(args.elasticity, args.gravity, args.damping, args.radius)
+    pegs = load_layout(args.layout).tolist() if args.layout else []
+    print(f"{len(plan)} points x {args.drops} drops", file=sys.stderr)
+
+    try:
+        result = run_sweep(pegs, attrs, plan, base, args.drops, args.workers, args.seed,
+                           args.out, grid=args.lhs is None, progress=True)
+    except KeyboardInterrupt:
+        raise SystemExit("\ninterrupted; run the same command again to resume")
+    result.save_npz(os.path.join(args.out, "sweep.npz"))
+    result.save_csv(os.path.join(args.out, "sweep.csv"))
+    if not args.no_heatmaps:
+        save_heatmaps(result, args.out)
+
+    best, worst = np.argmax(result.expected_score), np.argmin(result.expected_score)
+    for label, i in (("highest", best), ("lowest", worst)):
+        values = ", ".join(f"{_short(a)}={v:g}" for a, v in zip(attrs, plan[i]))
+        print(f"{label} expected score {result.expected_score[i]:.3f} at {values}")
+    print(f"results in {args.out}/")
+
+
+if __name__ == "__main__":
+    main()